@@ -0,0 +1,132 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from . import reference
+from .cache import recipe_cache, reference_versions
+from .conditions import add_validators, not_modified, version_validators
+from .filters import SearchFilter
+from .serializers import IngredientSerializer, TagSerializer
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+LIST_ACTIONS = {'get': 'list'}
+DETAIL_ACTIONS = {'get': 'retrieve'}
+
+
+def database(func):
+    return sync_to_async(func, thread_sensitive=True)
+
+
+def csrf_exempt(view):
+    view.csrf_exempt = True
+    return view
+
+
+def sync_view(viewset, basename, actions, detail):
+    return database(
+        viewset.as_view(actions, basename=basename, detail=detail)
+    )
+
+
+def json_response(data):
+    response = HttpResponse(
+        JSONRenderer().render(data),
+        content_type=JSONRenderer.media_type
+    )
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def is_anonymous(request):
+    return 'HTTP_AUTHORIZATION' not in request.META
+
+
+async def reference_response(request, table, build):
+    version = await database(reference_versions.get)(table.name)
+    validators = version_validators(table.name, version)
+    response = not_modified(request, *validators)
+    if response is not None:
+        return response
+    data = table.current(version)
+    if data is None:
+        data = await database(table.load)()
+    result = build(data)
+    if result is None:
+        return None
+    return add_validators(json_response(result), *validators)
+
+
+def detail_builder(serializer_class, pk):
+    def build(data):
+        obj = data['by_id'].get(pk)
+        return None if obj is None else serializer_class(obj).data
+    return build
+
+
+sync_tag_list = sync_view(TagViewSet, 'tags', LIST_ACTIONS, False)
+sync_tag_detail = sync_view(TagViewSet, 'tags', DETAIL_ACTIONS, True)
+sync_ingredient_list = sync_view(
+    IngredientViewSet, 'ingredients', LIST_ACTIONS, False
+)
+sync_ingredient_detail = sync_view(
+    IngredientViewSet, 'ingredients', DETAIL_ACTIONS, True
+)
+sync_recipe_list = sync_view(
+    RecipeViewSet, 'recipes', {'get': 'list', 'post': 'create'}, False
+)
+
+
+@csrf_exempt
+async def tag_list(request):
+    if request.method == 'GET':
+        return await reference_response(
+            request, reference.tags,
+            lambda data: TagSerializer(data['objects'], many=True).data
+        )
+    return await sync_tag_list(request)
+
+
+@csrf_exempt
+async def tag_detail(request, pk):
+    response = None
+    if request.method == 'GET':
+        response = await reference_response(
+            request, reference.tags, detail_builder(TagSerializer, pk)
+        )
+    return response or await sync_tag_detail(request, pk=str(pk))
+
+
+@csrf_exempt
+async def ingredient_list(request):
+    if request.method == 'GET':
+        query = request.GET.get(SearchFilter.search_param, '')
+        return await reference_response(
+            request, reference.ingredients,
+            lambda data: reference.ingredients.search_rows(data, query)
+        )
+    return await sync_ingredient_list(request)
+
+
+@csrf_exempt
+async def ingredient_detail(request, pk):
+    response = None
+    if request.method == 'GET':
+        response = await reference_response(
+            request, reference.ingredients,
+            detail_builder(IngredientSerializer, pk)
+        )
+    return response or await sync_ingredient_detail(request, pk=str(pk))
+
+
+@csrf_exempt
+async def recipe_list(request):
+    if request.method == 'GET' and is_anonymous(request):
+        data = await database(
+            lambda: recipe_cache.lookup(recipe_cache.list_key(request))
+        )()
+        if data is not None:
+            response = json_response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+    return await sync_recipe_list(request)
@@ -0,0 +1,278 @@
+import base64
+import random
+from dataclasses import dataclass, field
+from io import BytesIO
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipes.counters import recount_counters
+from recipes.feed import rebuild_feeds
+from recipes.images import wait_for_variants
+from recipes.models import (Favorite, Ingredient, IngredientRecipe,
+                            PurchaseList, Recipe, Subscribe, Tag)
+
+User = get_user_model()
+
+
+@dataclass
+class Case:
+    name: str
+    method: str
+    url: object
+    max_queries: int = None
+    status: int = 200
+    data: object = None
+    user: str = 'user'
+    max_ms: float = 250
+    format: str = 'json'
+
+
+@dataclass
+class Result:
+    case: Case
+    status: int
+    queries: int
+    timings: list = field(default_factory=list)
+
+    @property
+    def ms(self):
+        return median(self.timings)
+
+    def failures(self, max_queries, max_ms):
+        failures = []
+        if self.status != self.case.status:
+            failures.append(
+                f'статус {self.status}, ожидался {self.case.status}'
+            )
+        if max_queries is not None and self.queries > max_queries:
+            failures.append(f'запросов {self.queries} > {max_queries}')
+        if max_ms is not None and self.ms > max_ms:
+            failures.append(f'{self.ms:.1f} мс > {max_ms} мс')
+        return failures
+
+
+def image_base64():
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), 'orange').save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+class Dataset:
+    def __init__(self, users=20, recipes_per_user=10, ingredients=200,
+                 tags=5, seed=0):
+        self.random = random.Random(seed)
+        self.users_count = users
+        self.recipes_per_user = recipes_per_user
+        self.ingredients_count = ingredients
+        self.tags_count = tags
+
+    def seed(self):
+        self.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', color=f'#{i:06x}', slug=f'tag{i}')
+            for i in range(self.tags_count)
+        )
+        self.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент {i}', measurement_unit='г')
+            for i in range(self.ingredients_count)
+        )
+        self.users = User.objects.bulk_create(
+            User(email=f'user{i}@bench.ru', username=f'user{i}',
+                 first_name='Имя', last_name='Фамилия')
+            for i in range(self.users_count)
+        )
+        self.user = self.users[0]
+        self.recipes = Recipe.objects.bulk_create(
+            Recipe(author=author, name=f'Рецепт {author.pk}-{i}',
+                   text='Описание', cooking_time=i + 1)
+            for author in self.users
+            for i in range(self.recipes_per_user)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe in self.recipes
+            for tag in self.random.sample(self.tags, 2)
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient,
+                             amount=self.random.randint(1, 500))
+            for recipe in self.recipes
+            for ingredient in self.random.sample(self.ingredients, 8)
+        )
+        others = [
+            recipe for recipe in self.recipes if recipe.author != self.user
+        ]
+        self.favorited, self.free = others[:30], others[30:]
+        Favorite.objects.bulk_create(
+            Favorite(user=self.user, recipe=recipe)
+            for recipe in self.favorited
+        )
+        PurchaseList.objects.bulk_create(
+            PurchaseList(user=self.user, recipe=recipe)
+            for recipe in self.favorited
+        )
+        half = len(self.users) // 2
+        self.followed, self.unfollowed = (
+            self.users[1:half], self.users[half:]
+        )
+        Subscribe.objects.bulk_create(
+            Subscribe(user=self.user, author=author)
+            for author in self.followed
+        )
+        recount_counters()
+        rebuild_feeds()
+        self.created = []
+
+
+def default_cases(data):
+    image = image_base64()
+
+    def recipe_payload(i):
+        return {
+            'name': f'Новый рецепт {i}',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': image,
+            'tags': [tag.pk for tag in data.tags[:2]],
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': 10}
+                for ingredient in data.ingredients[i:i + 10]
+            ],
+        }
+
+    def created(i):
+        return data.created[i % len(data.created)]
+
+    def recipe(i):
+        return f'/api/recipes/{data.recipes[i].pk}/'
+
+    def bulk(i):
+        return {
+            'recipes': [
+                recipe.pk for recipe in data.free[20 + i * 10:30 + i * 10]
+            ],
+        }
+
+    own = [recipe for recipe in data.recipes if recipe.author == data.user]
+    tags = f'tags={data.tags[0].slug}&tags={data.tags[1].slug}'
+    return [
+        Case('tags-list', 'get', '/api/tags/', 1, user='anon'),
+        Case('tags-detail', 'get', f'/api/tags/{data.tags[0].pk}/', 1,
+             user='anon'),
+        Case('ingredients-list', 'get', '/api/ingredients/?name=ингр', 1,
+             user='anon'),
+        Case('ingredients-detail', 'get',
+             f'/api/ingredients/{data.ingredients[0].pk}/', 1, user='anon'),
+        Case('recipes-list-anon', 'get', '/api/recipes/', 4, user='anon'),
+        Case('recipes-list', 'get', '/api/recipes/', 4),
+        Case('recipes-list-100', 'get', '/api/recipes/?limit=100', 4),
+        Case('recipes-list-filtered', 'get',
+             f'/api/recipes/?{tags}&is_favorited=1', 5),
+        Case('recipes-feed', 'get', '/api/recipes/feed/', 4),
+        Case('recipes-search', 'get', '/api/recipes/?search=рецепт', 4),
+        Case('recipes-list-author', 'get',
+             f'/api/recipes/?author={data.users[1].pk}', 5),
+        Case('recipes-list-cursor', 'get', '/api/recipes/?cursor=', 3),
+        Case('recipes-detail-anon', 'get', recipe, 4, user='anon'),
+        Case('recipes-detail', 'get', recipe, 4),
+        Case('recipes-create', 'post', '/api/recipes/', 13, status=201,
+             data=recipe_payload, max_ms=500),
+        Case('recipes-update', 'patch',
+             lambda i: f'/api/recipes/{created(i)}/', 12,
+             data=lambda i: {
+                 'text': f'Правка {i}',
+                 'ingredients': recipe_payload(i + 1)['ingredients'],
+             }),
+        Case('recipes-delete', 'delete',
+             lambda i: f'/api/recipes/{own[i].pk}/', 11, status=204),
+        Case('favorite-add', 'get',
+             lambda i: f'/api/recipes/{data.free[i].pk}/favorite/', 3,
+             status=201),
+        Case('favorite-delete', 'delete',
+             lambda i: f'/api/recipes/{data.favorited[i].pk}/favorite/', 2,
+             status=204),
+        Case('shopping-cart-add', 'get',
+             lambda i: f'/api/recipes/{data.free[i].pk}/shopping_cart/', 3,
+             status=201),
+        Case('shopping-cart-delete', 'delete',
+             lambda i: f'/api/recipes/{data.favorited[i].pk}/shopping_cart/',
+             2, status=204),
+        Case('favorite-bulk-add', 'post', '/api/recipes/favorite/', 5,
+             status=201, data=bulk),
+        Case('favorite-bulk-delete', 'delete', '/api/recipes/favorite/', 4,
+             data=bulk),
+        Case('shopping-cart-bulk-add', 'post', '/api/recipes/shopping_cart/',
+             5, status=201, data=bulk),
+        Case('shopping-cart-bulk-delete', 'delete',
+             '/api/recipes/shopping_cart/', 4, data=bulk),
+        Case('download-shopping-cart', 'get',
+             '/api/recipes/download_shopping_cart/', 1),
+        Case('subscriptions', 'get',
+             '/api/users/subscriptions/?recipes_limit=3', 3),
+        Case('subscribe', 'get',
+             lambda i: f'/api/users/{data.unfollowed[i].pk}/subscribe/', 6,
+             status=201),
+        Case('unsubscribe', 'delete',
+             lambda i: f'/api/users/{data.followed[i].pk}/subscribe/', 3,
+             status=204),
+        Case('users-list', 'get', '/api/users/', 1, user='anon'),
+        Case('users-detail', 'get', f'/api/users/{data.users[1].pk}/', 2),
+        Case('users-me', 'get', '/api/users/me/', 1),
+        Case('users-create', 'post', '/api/users/', 4, status=201,
+             data=lambda i: {
+                 'email': f'new{i}@bench.ru', 'username': f'new{i}',
+                 'first_name': 'Имя', 'last_name': 'Фамилия',
+                 'password': 'Bench-Password-1',
+             }, user='anon', max_ms=1000),
+    ]
+
+
+class Benchmark:
+    def __init__(self, data, cases, repeat=5, budgets=None,
+                 check_latency=True):
+        self.data = data
+        self.cases = cases
+        self.repeat = repeat
+        self.budgets = budgets or {}
+        self.check_latency = check_latency
+        self.clients = {'anon': APIClient(), 'user': APIClient()}
+        self.clients['user'].force_authenticate(data.user)
+
+    def request(self, case, i):
+        url = case.url(i) if callable(case.url) else case.url
+        payload = case.data(i) if callable(case.data) else case.data
+        client = self.clients[case.user]
+        if i == 0:
+            caches[settings.RECIPES_CACHE_ALIAS].clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = perf_counter()
+            response = getattr(client, case.method)(
+                url, payload, format=case.format
+            )
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            elapsed = (perf_counter() - started) * 1000
+        wait_for_variants()
+        if case.name == 'recipes-create' and response.status_code == 201:
+            self.data.created.append(response.data['id'])
+        return response.status_code, len(queries), elapsed
+
+    def run(self):
+        for case in self.cases:
+            status, queries, elapsed = self.request(case, 0)
+            result = Result(case, status, queries, [elapsed])
+            for i in range(1, self.repeat):
+                result.timings.append(self.request(case, i)[2])
+            budget = self.budgets.get(case.name, {})
+            yield result, result.failures(
+                budget.get('queries', case.max_queries),
+                budget.get('ms', case.max_ms) if self.check_latency else None
+            )
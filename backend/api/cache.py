@@ -0,0 +1,141 @@
+from hashlib import md5
+from time import time, time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .replicas import read_database
+
+
+class RecipeResponseCache:
+    prefix = 'recipes'
+    global_generation = 'recipes:generation'
+    list_generation = 'recipes:generation:list'
+    stats_keys = {'hit': 'recipes:stats:hit', 'miss': 'recipes:stats:miss'}
+
+    @property
+    def cache(self):
+        return caches[settings.RECIPES_CACHE_ALIAS]
+
+    @staticmethod
+    def recipe_generation(pk):
+        return f'recipes:generation:{pk}'
+
+    @staticmethod
+    def modified_key(key):
+        return f'{key}:modified'
+
+    @staticmethod
+    def initial_generation():
+        return int(time() * 1000)
+
+    def generations(self, *keys):
+        values = self.cache.get_many(keys)
+        for key in keys:
+            if key not in values:
+                self.cache.add(self.modified_key(key), time(), None)
+                self.cache.add(key, self.initial_generation(), None)
+                values[key] = self.cache.get(key)
+        return ':'.join(str(values[key]) for key in keys)
+
+    def modified(self, key):
+        return self.cache.get(self.modified_key(key))
+
+    def incr(self, key, initial):
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, initial, None)
+
+    def bump(self, *keys):
+        def bump_generations():
+            for key in keys:
+                self.cache.set(self.modified_key(key), time(), None)
+                self.incr(key, self.initial_generation())
+        transaction.on_commit(bump_generations)
+
+    def invalidate(self):
+        self.bump(self.global_generation)
+
+    def invalidate_recipe(self, pk):
+        self.bump(self.list_generation, self.recipe_generation(pk))
+
+    def list_key(self, request):
+        query = '&'.join(
+            f'{name}={value}'
+            for name, values in sorted(request.GET.lists())
+            for value in sorted(values)
+        )
+        generation = self.generations(
+            self.global_generation, self.list_generation
+        )
+        digest = md5(f'{request.get_host()}?{query}'.encode()).hexdigest()
+        return f'{self.prefix}:{generation}:list:{digest}'
+
+    def detail_key(self, request, pk):
+        generation = self.generations(
+            self.global_generation, self.recipe_generation(pk)
+        )
+        digest = md5(request.get_host().encode()).hexdigest()
+        return f'{self.prefix}:{generation}:detail:{pk}:{digest}'
+
+    def lookup(self, key):
+        data = self.cache.get(key)
+        if data is not None:
+            self.incr(self.stats_keys['hit'], 1)
+        return data
+
+    @staticmethod
+    def timeout():
+        if read_database.get() is None:
+            return settings.RECIPES_CACHE_TIMEOUT
+        return settings.RECIPES_REPLICA_CACHE_TIMEOUT
+
+    def respond(self, key, build):
+        data = self.lookup(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        self.incr(self.stats_keys['miss'], 1)
+        response = build()
+        if response.status_code == status.HTTP_200_OK:
+            self.cache.set(key, response.data, self.timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def stats(self):
+        values = self.cache.get_many(self.stats_keys.values())
+        return {
+            name: values.get(key, 0)
+            for name, key in self.stats_keys.items()
+        }
+
+
+class ReferenceVersions:
+    @property
+    def cache(self):
+        return caches[settings.RECIPES_CACHE_ALIAS]
+
+    @staticmethod
+    def key(name):
+        return f'reference:{name}:version'
+
+    def get(self, name):
+        version = self.cache.get(self.key(name))
+        if version is None:
+            self.cache.add(self.key(name), time_ns() // 1000, None)
+            version = self.cache.get(self.key(name))
+        return version
+
+    def bump(self, name):
+        transaction.on_commit(
+            lambda: self.cache.set(self.key(name), time_ns() // 1000, None)
+        )
+
+
+recipe_cache = RecipeResponseCache()
+reference_versions = ReferenceVersions()
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def is_process_local(alias):
+    return isinstance(caches[alias], PROCESS_LOCAL_CACHES)
+
+
+@register(Tags.caches, deploy=True)
+def check_reference_versions_cache(app_configs, **kwargs):
+    if not is_process_local(settings.RECIPES_CACHE_ALIAS):
+        return []
+    return [Warning(
+        'Версии справочников и поколения кеша рецептов хранятся в памяти '
+        'процесса: изменения из других воркеров и команд manage.py не '
+        'доходят до запущенных серверов.',
+        hint='Укажите общий CACHE_BACKEND, например Redis или Memcached.',
+        id='api.W001',
+    )]
+
+
+@register(Tags.caches, Tags.database)
+def check_replica_pin_cache(app_configs, **kwargs):
+    if (not settings.DATABASE_REPLICAS
+            or not is_process_local(settings.DATABASE_PIN_CACHE_ALIAS)):
+        return []
+    return [Error(
+        'Отметки о недавней записи пользователя хранятся в памяти процесса: '
+        'запрос в другой воркер прочитает реплику и может не увидеть '
+        'только что сохраненные данные.',
+        hint='При DB_REPLICAS укажите общий CACHE_BACKEND, например Redis '
+             'или Memcached.',
+        id='api.E001',
+    )]
@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from recipes.models import Recipe
+
+from .cache import recipe_cache, reference_versions
+
+
+def reference_validators(name):
+    return version_validators(name, reference_versions.get(name))
+
+
+def version_validators(name, version):
+    if version is None:
+        return None, None
+    return (
+        quote_etag(f'{name}-{version}'),
+        datetime.fromtimestamp(version // 10 ** 6, timezone.utc)
+    )
+
+
+def recipe_validators(request, pk):
+    user = request.user
+    fields = ['pk', 'pub_date', 'edited']
+    if not user.is_anonymous:
+        fields += ['is_favorited', 'is_in_shopping_cart', 'is_subscribed']
+    values = Recipe.objects.with_user_flags(user).filter(
+        pk=pk
+    ).values_list(*fields).first()
+    if values is None:
+        return None, None
+    generation = recipe_cache.generations(recipe_cache.global_generation)
+    tag = md5(f'{user.pk}:{values}:{generation}'.encode()).hexdigest()
+    if not user.is_anonymous:
+        return quote_etag(tag), None
+    modified = recipe_cache.modified(recipe_cache.global_generation)
+    if modified is None:
+        return quote_etag(tag), None
+    return quote_etag(tag), max(
+        values[2], datetime.fromtimestamp(modified, timezone.utc)
+    )
+
+
+def not_modified(request, etag, last_modified=None):
+    if etag is None:
+        return None
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp())
+    )
+    if response is None:
+        return None
+    return add_validators(response, etag, last_modified)
+
+
+def add_validators(response, etag, last_modified=None):
+    if etag is None or response.status_code not in (200, 304):
+        return response
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class ReferenceConditionalMixin:
+    reference_name = None
+
+    def conditional(self, request, build):
+        validators = reference_validators(self.reference_name)
+        return not_modified(request, *validators) or add_validators(
+            build(), *validators
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(
+            request,
+            lambda: super(ReferenceConditionalMixin, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(
+            request,
+            lambda: super(ReferenceConditionalMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
@@ -0,0 +1,116 @@
+import re
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+
+TABLE_ALIAS = re.compile(
+    r'(?:FROM|JOIN)\s+"(\w+)"(?:\s+(?:AS\s+)?"?([A-Z]\d+)"?)?'
+)
+POSTGRESQL_SCAN = re.compile(r'Seq Scan on (\w+)')
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+@dataclass
+class Plan:
+    url: str
+    sql: str
+    lines: list
+    scans: list
+
+
+def large_tables(min_rows):
+    return {
+        model._meta.db_table
+        for model in apps.get_models(include_auto_created=True)
+        if model._meta.app_label in ('recipes', 'users')
+        and model._base_manager.count() >= min_rows
+    }
+
+
+def is_full_count(sql):
+    return sql.startswith('SELECT COUNT(*)') and ' WHERE ' not in sql
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[3] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN {sql}')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def sequential_scans(sql, lines):
+    if connection.vendor == 'sqlite':
+        aliases = {}
+        for table, alias in TABLE_ALIAS.findall(sql):
+            aliases[alias or table] = table
+        found = (SQLITE_SCAN.match(line) for line in lines)
+        return [aliases.get(match[1], match[1]) for match in found if match]
+    return [
+        table for line in lines for table in POSTGRESQL_SCAN.findall(line)
+    ]
+
+
+def default_urls(user):
+    recipe = Recipe.objects.order_by('-favorites_count').first()
+    author = User.objects.order_by('-recipes_count').first()
+    tags = '&'.join(
+        f'tags={slug}'
+        for slug in Tag.objects.values_list('slug', flat=True)[:2]
+    )
+    urls = [
+        '/api/recipes/',
+        '/api/recipes/?cursor=',
+        '/api/recipes/feed/',
+        f'/api/recipes/?{tags}',
+        f'/api/recipes/?{tags}&is_favorited=1',
+        '/api/recipes/?is_in_shopping_cart=1',
+        '/api/recipes/?search=рецепт',
+        '/api/recipes/download_shopping_cart/',
+        '/api/users/',
+        '/api/users/subscriptions/?recipes_limit=3',
+    ]
+    if author is not None:
+        urls += [
+            f'/api/recipes/?author={author.pk}',
+            f'/api/users/{author.pk}/',
+        ]
+    if recipe is not None:
+        urls.append(f'/api/recipes/{recipe.pk}/')
+    return urls
+
+
+def sample_user():
+    return User.objects.annotate(
+        subscriptions=Count('follower')
+    ).order_by('-subscriptions').first()
+
+
+def capture_plans(user, urls, tables):
+    client = APIClient()
+    client.force_authenticate(user)
+    for url in urls:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or is_full_count(sql):
+                continue
+            lines = explain(sql)
+            scans = [
+                table for table in sequential_scans(sql, lines)
+                if table in tables
+            ]
+            yield Plan(url, sql, lines, scans)
@@ -1,31 +1,67 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
+from django_filters.fields import MultipleChoiceField
 from rest_framework.filters import SearchFilter as BaseSearchFilter
 
-from recipes.models import Recipe, Tag
+from recipes.models import Favorite, PurchaseList, Recipe
+from recipes.search import search_recipes
+
+from . import reference
+
+
+def tag_choices():
+    return reference.tags.slug_choices()
+
+
+class TagSlugField(MultipleChoiceField):
+    def valid_value(self, value):
+        return reference.tags.get_by_slug(value) is not None
+
+
+class TagSlugFilter(filters.MultipleChoiceFilter):
+    field_class = TagSlugField
 
 
 class RecipeFilter(filters.FilterSet):
     is_favorited = filters.BooleanFilter(method='get_favorites')
     is_in_shopping_cart = filters.BooleanFilter(method='get_in_shopping_cart')
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all()
+    tags = TagSlugFilter(
+        choices=tag_choices,
+        method='get_tags'
     )
+    search = filters.CharFilter(method='get_search')
 
     class Meta:
         model = Recipe
-        fields = ('is_favorited', 'is_in_shopping_cart', 'author', 'tags',)
+        fields = (
+            'is_favorited', 'is_in_shopping_cart', 'author', 'tags', 'search',
+        )
+
+    def filter_user_relation(self, queryset, model, value):
+        if not value:
+            return queryset
+        if self.request.user.is_anonymous:
+            return queryset.none()
+        return queryset.filter(Exists(model.objects.filter(
+            user=self.request.user,
+            recipe=OuterRef('pk')
+        )))
 
     def get_favorites(self, queryset, name, value):
-        if value:
-            return Recipe.objects.filter(favorited_by__user=self.request.user)
-        return Recipe.objects.all()
+        return self.filter_user_relation(queryset, Favorite, value)
 
     def get_in_shopping_cart(self, queryset, name, value):
-        if value:
-            return Recipe.objects.filter(customers__user=self.request.user)
-        return Recipe.objects.all()
+        return self.filter_user_relation(queryset, PurchaseList, value)
+
+    def get_tags(self, queryset, name, value):
+        tag_ids = [reference.tags.get_by_slug(slug).pk for slug in value]
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'),
+            tag_id__in=tag_ids
+        )))
+
+    def get_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
 
 
 class SearchFilter(BaseSearchFilter):
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import perf_counter
+
+WSGI = ['foodgram.wsgi:application', '--worker-class', 'gthread']
+ASGI = [
+    'foodgram.asgi:application',
+    '--worker-class', 'uvicorn.workers.UvicornWorker'
+]
+SERVERS = {
+    'wsgi': (WSGI, 'False'),
+    'asgi': (ASGI, 'True'),
+    'asgi-sync': (ASGI, 'False'),
+}
+
+
+@dataclass
+class LoadResult:
+    server: str
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0
+
+    @property
+    def throughput(self):
+        return len(self.latencies) / self.elapsed if self.elapsed else 0
+
+    def percentile(self, value):
+        if not self.latencies:
+            return 0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * value / 100))]
+
+
+def build_request(host, path, token=None):
+    lines = [
+        f'GET {path} HTTP/1.1',
+        f'Host: {host}',
+        'Accept: application/json',
+        'Connection: close',
+    ]
+    if token:
+        lines.append(f'Authorization: Token {token}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+
+async def fetch(host, port, request):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def run_load(server, host, port, requests, total, concurrency):
+    result = LoadResult(server)
+    indexes = iter(range(total))
+
+    async def worker():
+        for index in indexes:
+            started = perf_counter()
+            try:
+                status = await fetch(
+                    host, port, requests[index % len(requests)]
+                )
+            except (OSError, ValueError, IndexError):
+                result.errors += 1
+                continue
+            if status >= 400:
+                result.errors += 1
+            else:
+                result.latencies.append(perf_counter() - started)
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = perf_counter() - started
+    return result
+
+
+def wait_for_port(process, host, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            socket.create_connection((host, port), 0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+@contextmanager
+def serve(server, host, port, workers, threads, timeout=30):
+    arguments, async_views = SERVERS[server]
+    process = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', *arguments,
+        '--bind', f'{host}:{port}',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--backlog', '4096',
+        '--log-level', 'warning',
+    ], env={**os.environ, 'ASYNC_VIEWS': async_views})
+    try:
+        if not wait_for_port(process, host, port, timeout):
+            raise RuntimeError(f'Сервер {server} не запустился.')
+        yield process
+    finally:
+        process.terminate()
+        process.wait()
@@ -0,0 +1,90 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from api.benchmarks import Benchmark, Dataset, default_cases
+
+
+class Command(BaseCommand):
+    help = ('Замеряет число SQL-запросов и время ответа каждого эндпоинта '
+            'API на тестовой базе')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--recipes-per-user', type=int, default=10)
+        parser.add_argument('--ingredients', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--budgets',
+            type=Path,
+            help='JSON вида {"recipes-list": {"queries": 4, "ms": 100}}'
+        )
+        parser.add_argument(
+            '--queries-only',
+            action='store_true',
+            help='Проверять только число запросов, без бюджета времени'
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            help='Запустить только перечисленные сценарии'
+        )
+
+    def handle(self, *args, **options):
+        if not 1 <= options['repeat'] <= options['recipes_per_user']:
+            raise CommandError(
+                '--repeat должен быть от 1 до --recipes-per-user.'
+            )
+        budgets = {}
+        if options['budgets']:
+            budgets = json.loads(options['budgets'].read_text())
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(MEDIA_ROOT=media_root,
+                                      CACHES=settings.TEST_CACHES):
+                failed = self.run_benchmark(options, budgets)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        if failed:
+            raise CommandError(
+                f'Превышен бюджет: {", ".join(failed)}.'
+            )
+
+    def run_benchmark(self, options, budgets):
+        data = Dataset(
+            users=options['users'],
+            recipes_per_user=options['recipes_per_user'],
+            ingredients=options['ingredients'],
+            seed=options['seed']
+        )
+        data.seed()
+        cases = default_cases(data)
+        if options['only']:
+            cases = [case for case in cases if case.name in options['only']]
+        benchmark = Benchmark(
+            data, cases, options['repeat'], budgets,
+            check_latency=not options['queries_only']
+        )
+        self.stdout.write(
+            f'{"сценарий":<26}{"статус":>7}{"запросы":>9}{"мс":>9}'
+        )
+        failed = []
+        for result, failures in benchmark.run():
+            line = (f'{result.case.name:<26}{result.status:>7}'
+                    f'{result.queries:>9}{result.ms:>9.1f}')
+            if failures:
+                failed.append(result.case.name)
+                self.stdout.write(self.style.ERROR(
+                    f'{line}  {"; ".join(failures)}'
+                ))
+            else:
+                self.stdout.write(line)
+        return failed
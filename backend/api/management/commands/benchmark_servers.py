@@ -0,0 +1,63 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadtest import SERVERS, build_request, run_load, serve
+
+DEFAULT_PATHS = [
+    '/api/recipes/',
+    '/api/tags/',
+    '/api/ingredients/?name=%D1%81',
+]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность и задержки API под WSGI и '
+            'ASGI на текущей базе при высокой конкурентности')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--servers',
+            nargs='+',
+            choices=SERVERS,
+            default=['wsgi', 'asgi']
+        )
+        parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--token', help='Токен для авторизованных путей')
+
+    def handle(self, *args, **options):
+        host, port = options['host'], options['port']
+        requests = [
+            build_request(f'{host}:{port}', path, options['token'])
+            for path in options['paths']
+        ]
+        self.stdout.write(
+            f'{"server":<10}{"ok":>8}{"errors":>8}{"rps":>10}'
+            f'{"p50 ms":>10}{"p99 ms":>10}'
+        )
+        for server in options['servers']:
+            try:
+                with serve(server, host, port, options['workers'],
+                           options['threads']):
+                    asyncio.run(run_load(
+                        server, host, port, requests,
+                        options['concurrency'], options['concurrency']
+                    ))
+                    result = asyncio.run(run_load(
+                        server, host, port, requests,
+                        options['requests'], options['concurrency']
+                    ))
+            except RuntimeError as error:
+                raise CommandError(error)
+            self.stdout.write(
+                f'{server:<10}{len(result.latencies):>8}{result.errors:>8}'
+                f'{result.throughput:>10.1f}'
+                f'{result.percentile(50) * 1000:>10.1f}'
+                f'{result.percentile(99) * 1000:>10.1f}'
+            )
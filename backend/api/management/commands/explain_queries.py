@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.explain import capture_plans, default_urls, large_tables, sample_user
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN для SQL-запросов основных эндпоинтов API '
+            'и завершается с ошибкой при последовательном сканировании '
+            'больших таблиц')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=10000,
+            help='Таблицы с таким числом строк и больше считаются большими'
+        )
+        parser.add_argument('--email', help='Пользователь для запросов')
+        parser.add_argument(
+            '--url',
+            nargs='+',
+            help='Проверить только эти URL'
+        )
+        parser.add_argument('--plans', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['email']:
+            user = User.objects.filter(email=options['email']).first()
+        else:
+            user = sample_user()
+        if user is None:
+            raise CommandError('Пользователь не найден.')
+        tables = large_tables(options['min_rows'])
+        self.stdout.write(
+            f'Большие таблицы: {", ".join(sorted(tables)) or "нет"}'
+        )
+        failed = []
+        with transaction.atomic():
+            for plan in capture_plans(
+                    user, options['url'] or default_urls(user), tables):
+                if plan.scans:
+                    failed.append(plan)
+                    self.stdout.write(self.style.ERROR(
+                        f'{plan.url}: сканирование {", ".join(plan.scans)}'
+                    ))
+                    self.stdout.write(plan.sql)
+                if plan.scans or options['plans']:
+                    self.stdout.write('\n'.join(
+                        f'    {line}' for line in plan.lines
+                    ))
+            transaction.set_rollback(True)
+        if failed:
+            raise CommandError(
+                f'Последовательное сканирование в {len(failed)} запросах.'
+            )
+        self.stdout.write(self.style.SUCCESS('Сканирований не найдено.'))
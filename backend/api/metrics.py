@@ -0,0 +1,131 @@
+import asyncio
+import os
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+
+UNRESOLVED_VIEW = 'unresolved'
+
+REQUESTS = Counter(
+    'foodgram_requests_total',
+    'Число обработанных запросов',
+    ['view', 'method', 'status']
+)
+LATENCY = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время обработки запроса',
+    ['view']
+)
+DB_QUERIES = Counter(
+    'foodgram_db_queries_total',
+    'Число SQL-запросов',
+    ['view']
+)
+DB_TIME = Counter(
+    'foodgram_db_query_duration_seconds_total',
+    'Суммарное время SQL-запросов',
+    ['view']
+)
+
+
+current_stats = ContextVar('query_stats', default=None)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.duration += perf_counter() - started
+        stats.count += 1
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else UNRESOLVED_VIEW
+
+
+def observe(request, response, started, stats):
+    name = view_name(request)
+    LATENCY.labels(name).observe(perf_counter() - started)
+    REQUESTS.labels(name, request.method, response.status_code).inc()
+    if stats.count:
+        DB_QUERIES.labels(name).inc(stats.count)
+        DB_TIME.labels(name).inc(stats.duration)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        for connection in connections.all():
+            install_query_recorder(None, connection)
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        stats = QueryStats()
+        started = perf_counter()
+        token = current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        observe(request, response, started, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        started = perf_counter()
+        token = current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        observe(request, response, started, stats)
+        return response
+
+
+def metrics_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    return HttpResponse(
+        generate_latest(metrics_registry()),
+        content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,122 @@
+from bisect import bisect_left
+from threading import Lock
+
+from recipes.models import Ingredient, Tag
+
+from .cache import reference_versions
+from .replicas import primary_reads
+
+
+class ReferenceTable:
+    name = None
+    model = None
+
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.data = None
+
+    def build(self, objects):
+        return {
+            'objects': objects,
+            'by_id': {obj.pk: obj for obj in objects},
+        }
+
+    def current(self, version):
+        data = self.data
+        if data is None or version is None or self.version != version:
+            return None
+        return data
+
+    def load(self):
+        version = reference_versions.get(self.name)
+        data = self.current(version)
+        if data is None:
+            with self.lock:
+                data = self.current(version)
+                if data is None:
+                    with primary_reads():
+                        objects = list(self.model.objects.all())
+                    data = self.build(objects)
+                    self.data = data
+                    self.version = version
+        return data
+
+    def all(self):
+        return self.load()['objects']
+
+    def get(self, pk):
+        obj = self.load()['by_id'].get(pk)
+        if obj is None:
+            obj = self.model.objects.filter(pk=pk).first()
+        return obj
+
+    def ids(self):
+        return self.load()['by_id'].keys()
+
+    def missing(self, ids):
+        missing = set(ids) - self.ids()
+        if missing:
+            missing -= set(self.model.objects.filter(
+                pk__in=missing
+            ).values_list('pk', flat=True))
+        return missing
+
+
+class TagTable(ReferenceTable):
+    name = 'tags'
+    model = Tag
+
+    def build(self, objects):
+        data = super().build(objects)
+        data['by_slug'] = {obj.slug: obj for obj in objects}
+        return data
+
+    def get_by_slug(self, slug):
+        tag = self.load()['by_slug'].get(slug)
+        if tag is None:
+            tag = self.model.objects.filter(slug=slug).first()
+        return tag
+
+    def slug_choices(self):
+        return [
+            (slug, tag.name) for slug, tag in self.load()['by_slug'].items()
+        ]
+
+
+class IngredientTable(ReferenceTable):
+    name = 'ingredients'
+    model = Ingredient
+
+    def build(self, objects):
+        data = super().build(objects)
+        rows = sorted(
+            ({'id': obj.pk, 'name': obj.name,
+              'measurement_unit': obj.measurement_unit} for obj in objects),
+            key=lambda row: (row['name'].lower(), row['id'])
+        )
+        data['rows'] = rows
+        data['keys'] = [row['name'].lower() for row in rows]
+        return data
+
+    def search(self, query):
+        return self.search_rows(self.load(), query)
+
+    @staticmethod
+    def search_rows(data, query):
+        keys, rows = data['keys'], data['rows']
+        query = query.lower()
+        if not query:
+            return rows
+        start = bisect_left(keys, query)
+        end = bisect_left(keys, query + '\uffff', start)
+        prefixed = rows[start:end]
+        contained = [
+            row for index, (key, row) in enumerate(zip(keys, rows))
+            if query in key and not start <= index < end
+        ]
+        return prefixed + contained
+
+
+tags = TagTable()
+ingredients = IngredientTable()
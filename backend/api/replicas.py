@@ -0,0 +1,135 @@
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+read_database = ContextVar('read_database', default=None)
+request_writes = ContextVar('request_writes', default=None)
+
+
+class WriteTracker:
+    def __init__(self):
+        self.written = False
+
+
+def pin_key(user_id):
+    return f'replicas:pinned:{user_id}'
+
+
+def pin_cache():
+    return caches[settings.DATABASE_PIN_CACHE_ALIAS]
+
+
+def pin(user):
+    pin_cache().set(
+        pin_key(user.pk), True, settings.DATABASE_READ_AFTER_WRITE
+    )
+
+
+def is_pinned(user):
+    return pin_cache().get(pin_key(user.pk)) is not None
+
+
+def replica_for(request):
+    if not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+        return None
+    if request.user.is_authenticated and is_pinned(request.user):
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+@contextmanager
+def reads_from(alias):
+    token = read_database.set(alias)
+    try:
+        yield
+    finally:
+        read_database.reset(token)
+
+
+def primary_reads():
+    return reads_from(None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        tracker = request_writes.get()
+        if tracker is not None:
+            tracker.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.replica_token = read_database.set(replica_for(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self.replica_token is not None:
+            read_database.reset(self.replica_token)
+            self.replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def replica_reads(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reads_from(replica_for(request)):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def remember_write(request):
+    if request.user.is_authenticated:
+        pin(request.user)
+
+
+class ReadAfterWriteMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        tracker = WriteTracker()
+        token = request_writes.set(tracker)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_writes.reset(token)
+        if tracker.written and settings.DATABASE_REPLICAS:
+            remember_write(request)
+        return response
+
+    async def __acall__(self, request):
+        tracker = WriteTracker()
+        token = request_writes.set(tracker)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_writes.reset(token)
+        if tracker.written and settings.DATABASE_REPLICAS:
+            await sync_to_async(remember_write, thread_sensitive=True)(
+                request
+            )
+        return response
@@ -1,13 +1,20 @@
+import json
+from pathlib import PurePath
+
 from django.contrib.auth import get_user_model
-from django.db.models import F
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Subquery
+from django.http import QueryDict
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
-from rest_framework.generics import get_object_or_404
 
 from recipes.models import (Favorite, Ingredient, IngredientRecipe,
                             PurchaseList, Recipe, Subscribe, Tag)
 from users.serializers import UserSerializer
 
+from . import reference
+
 User = get_user_model()
 
 
@@ -46,12 +53,46 @@ class AddIngredientToRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
+class ImageVariantField(serializers.ImageField):
+    def __init__(self, variant, **kwargs):
+        self.variant = variant
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if not instance.image:
+            return None
+        return getattr(instance, f'image_{self.variant}') or instance.image
+
+
+class RecipeImageField(Base64ImageField):
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            data.name = self.get_file_name(data) + PurePath(data.name).suffix
+            return serializers.ImageField.to_internal_value(self, data)
+        return super().to_internal_value(data)
+
+
+class ReferenceTagField(serializers.PrimaryKeyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            tag = reference.tags.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if tag is None:
+            self.fail('does_not_exist', pk_value=data)
+        return tag
+
+
 class RecipeListSerializer(serializers.ModelSerializer):
     author = UserSerializer()
     tags = TagSerializer(many=True)
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image = ImageVariantField('card')
 
     class Meta:
         model = Recipe
@@ -61,16 +102,22 @@ class RecipeListSerializer(serializers.ModelSerializer):
         )
 
     def get_ingredients(self, obj):
-        qs = IngredientRecipe.objects.filter(recipe=obj)
-        return ShowRecipeIngredientSerializer(qs, many=True).data
+        return ShowRecipeIngredientSerializer(
+            obj.ingredientrecipe_set.all(),
+            many=True
+        ).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
         return Favorite.objects.filter(user=request.user, recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
@@ -79,10 +126,19 @@ class RecipeListSerializer(serializers.ModelSerializer):
             recipe=obj
         ).exists()
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'is_subscribed'):
+            instance.author.is_subscribed = instance.is_subscribed
+        return super().to_representation(instance)
+
+
+class RecipeDetailSerializer(RecipeListSerializer):
+    image = ImageVariantField('full')
+
 
 class CreateRecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField(max_length=None, use_url=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    image = RecipeImageField(max_length=None, use_url=True)
+    tags = ReferenceTagField(
         many=True,
         queryset=Tag.objects.all()
     )
@@ -93,61 +149,104 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('author',)
 
-    def create(self, validated_data):
-        ingredients = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
-
+    def to_internal_value(self, data):
+        upload_errors = getattr(self.context.get('request'), 'upload_errors',
+                                None)
+        if upload_errors:
+            raise serializers.ValidationError(upload_errors)
+        if isinstance(data, QueryDict):
+            data = self.multipart_to_dict(data)
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def multipart_to_dict(data):
+        result = data.dict()
+        if 'tags' in data:
+            result['tags'] = data.getlist('tags')
+        if 'ingredients' in data:
+            try:
+                result['ingredients'] = json.loads(data['ingredients'])
+            except ValueError:
+                raise serializers.ValidationError({
+                    'ingredients': ['Ожидается список ингредиентов в JSON.']
+                })
+        return result
+
+    def validate_ingredients(self, ingredients):
+        amounts = {}
         for ingredient in ingredients:
             if ingredient['amount'] < 0:
                 raise serializers.ValidationError(
                     'Количество ингредиента не может быть '
                     'отрицательным числом.'
                 )
+            amounts[ingredient['id']] = (amounts.get(ingredient['id'], 0)
+                                         + ingredient['amount'])
+        missing = reference.ingredients.missing(amounts)
+        if missing:
+            raise serializers.ValidationError(
+                'Ингредиенты не найдены: '
+                f'{", ".join(map(str, sorted(missing)))}.'
+            )
+        return [{'id': id, 'amount': amount}
+                for id, amount in amounts.items()]
+
+    @transaction.atomic
+    def create(self, validated_data):
+        ingredients = validated_data.pop('ingredients')
+        tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
-        for ingredient in ingredients:
-            obj = get_object_or_404(Ingredient, id=ingredient['id'])
-            amount = ingredient['amount']
-            if IngredientRecipe.objects.filter(
-                    recipe=recipe,
-                    ingredient=obj
-            ).exists():
-                amount += F('amount')
-            IngredientRecipe.objects.update_or_create(
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
                 recipe=recipe,
-                ingredient=obj,
-                defaults={'amount': amount}
+                ingredient_id=ingredient['id'],
+                amount=ingredient['amount']
             )
+            for ingredient in ingredients
+        )
         return recipe
 
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        current = {
+            item.ingredient_id: item
+            for item in recipe.ingredientrecipe_set.all()
+        }
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        new, changed = [], []
+        for ingredient_id, amount in amounts.items():
+            item = current.get(ingredient_id)
+            if item is None:
+                new.append(IngredientRecipe(
+                    recipe=recipe,
+                    ingredient_id=ingredient_id,
+                    amount=amount
+                ))
+            elif item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        removed = current.keys() - amounts.keys()
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe,
+                ingredient_id__in=removed
+            ).delete()
+        IngredientRecipe.objects.bulk_create(new)
+        IngredientRecipe.objects.bulk_update(changed, ['amount'])
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        if 'ingredients' in self.initial_data:
-            ingredients = validated_data.pop('ingredients')
-
-            for ingredient in ingredients:
-                if ingredient['amount'] < 0:
-                    raise serializers.ValidationError(
-                        'Количество ингредиента не может быть '
-                        'отрицательным числом.'
-                    )
-            instance.ingredients.clear()
-            for ingredient in ingredients:
-                obj = get_object_or_404(Ingredient,
-                                        id=ingredient['id'])
-                amount = ingredient['amount']
-                if IngredientRecipe.objects.filter(
-                        recipe=instance,
-                        ingredient=obj
-                ).exists():
-                    amount += F('amount')
-                IngredientRecipe.objects.update_or_create(
-                    recipe=instance,
-                    ingredient=obj,
-                    defaults={'amount': amount}
-                )
-        if 'tags' in self.initial_data:
-            tags = validated_data.pop('tags')
-            instance.tags.set(tags)
+        if 'ingredients' in validated_data:
+            self.update_ingredients(
+                instance,
+                validated_data.pop('ingredients')
+            )
+        if 'tags' in validated_data:
+            instance.tags.set(validated_data.pop('tags'))
 
         instance.name = validated_data.get('name', instance.name)
         instance.text = validated_data.get('text', instance.text)
@@ -160,69 +259,46 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         return instance
 
     def to_representation(self, instance):
-        return RecipeListSerializer(
+        request = self.context.get('request')
+        if request is not None:
+            instance = Recipe.objects.with_related().with_user_flags(
+                request.user
+            ).get(pk=instance.pk)
+        return RecipeDetailSerializer(
             instance,
-            context={'request': self.context.get('request')}
+            context={'request': request}
         ).data
 
 
 class RecipeShortSerializer(serializers.ModelSerializer):
+    image = ImageVariantField('thumbnail')
+
     class Meta:
         model = Recipe
         fields = ['id', 'name', 'image', 'cooking_time']
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Favorite
-        fields = '__all__'
-
-    def validate(self, attrs):
-        request = self.context['request']
-        if (request.method == 'GET'
-                and Favorite.objects.filter(
-                    user=request.user,
-                    recipe=attrs['recipe']
-                ).exists()):
-            raise serializers.ValidationError(
-                'Рецепт уже добавлен в избранное'
-            )
-        return attrs
-
-    def to_representation(self, instance):
-        return RecipeShortSerializer(
-            instance.recipe,
-            context={'request': self.context.get('request')}
-        ).data
-
-
-class PurchaseListSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = PurchaseList
-        fields = '__all__'
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100
+    )
 
-    def validate(self, attrs):
-        request = self.context['request']
-        if (request.method == 'GET'
-                and PurchaseList.objects.filter(
-                    user=request.user,
-                    recipe=attrs['recipe'])):
+    def validate_recipes(self, value):
+        ids = list(dict.fromkeys(value))
+        recipes = Recipe.objects.short().in_bulk(ids)
+        missing = [pk for pk in ids if pk not in recipes]
+        if missing:
             raise serializers.ValidationError(
-                'Вы уже добавили рецепт в список покупок'
+                f'Рецепты не найдены: {", ".join(map(str, missing))}.'
             )
-        return attrs
-
-    def to_representation(self, instance):
-        return RecipeShortSerializer(
-            instance.recipe,
-            context={'request': self.context.get('request')}
-        ).data
+        return [recipes[pk] for pk in ids]
 
 
 class SubscribersSerializer(serializers.ModelSerializer):
     recipes = RecipeShortSerializer(many=True, read_only=True)
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -232,37 +308,29 @@ class SubscribersSerializer(serializers.ModelSerializer):
             'is_subscribed', 'recipes', 'recipes_count'
         )
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+    @staticmethod
+    def setup_queryset(queryset, request):
+        recipes = Recipe.objects.all()
+        try:
+            recipes_limit = int(request.query_params['recipes_limit'])
+        except (KeyError, ValueError):
+            recipes_limit = None
+        if recipes_limit is not None and recipes_limit >= 0:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).order_by('-pub_date', '-pk').values('pk')[:recipes_limit]
+            ))
+        return queryset.annotate(
+            is_subscribed=Exists(Subscribe.objects.filter(
+                user=request.user, author=OuterRef('pk')
+            ))
+        ).prefetch_related(Prefetch('recipes', queryset=recipes))
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
-        return Subscribe.objects.filter(user=obj, author=request.user).exists()
-
-
-class SubscribeSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Subscribe
-        fields = '__all__'
-
-    def validate(self, attrs):
-        request = self.context['request']
-        if request.method == 'GET':
-            if request.user == attrs['author']:
-                raise serializers.ValidationError(
-                    'Невозможно подписаться на себя'
-                )
-            if Subscribe.objects.filter(
-                    user=request.user,
-                    author=attrs['author']
-            ).exists():
-                raise serializers.ValidationError('Вы уже подписаны')
-        return attrs
-
-    def to_representation(self, instance):
-        return SubscribersSerializer(
-            instance.author,
-            context={'request': self.context.get('request')}
-        ).data
+        return Subscribe.objects.filter(user=request.user, author=obj).exists()
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from recipes.signals import bulk_loaded
+
+from .cache import recipe_cache, reference_versions
+
+User = get_user_model()
+
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+@receiver([post_save, post_delete, bulk_loaded], sender=Ingredient)
+def bump_ingredients_version(**kwargs):
+    reference_versions.bump('ingredients')
+
+
+@receiver([post_save, post_delete, bulk_loaded], sender=Tag)
+def bump_tags_version(**kwargs):
+    reference_versions.bump('tags')
+
+
+@receiver([post_save, post_delete, bulk_loaded], sender=Ingredient)
+@receiver([post_save, post_delete, bulk_loaded], sender=Tag)
+@receiver(bulk_loaded, sender=Recipe)
+def invalidate_recipe_cache(**kwargs):
+    recipe_cache.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def invalidate_cached_recipe(sender, instance, **kwargs):
+    recipe_cache.invalidate_recipe(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=IngredientRecipe)
+def invalidate_cached_recipe_ingredients(sender, instance, **kwargs):
+    recipe_cache.invalidate_recipe(instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_cached_recipe_tags(sender, instance, action, reverse,
+                                  **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        recipe_cache.invalidate()
+    else:
+        recipe_cache.invalidate_recipe(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_author(sender, instance, update_fields=None, **kwargs):
+    if not instance.recipes_count:
+        return
+    if update_fields is not None and not AUTHOR_FIELDS & set(update_fields):
+        return
+    recipe_cache.invalidate()
@@ -0,0 +1,104 @@
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from foodgram.asgi import application
+from recipes.models import Ingredient, IngredientRecipe, PurchaseList, Recipe
+
+User = get_user_model()
+
+
+def fill_purchase_list():
+    user = User.objects.create(email='user@test.ru', username='user')
+    salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+    milk = Ingredient.objects.create(name='молоко', measurement_unit='мл')
+    for name, amounts in [('Блины', (5, 500)), ('Омлет', (2, 100)),
+                          ('Каша', (1, 300))]:
+        recipe = Recipe.objects.create(
+            author=user, name=name, text='Описание', cooking_time=10
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient,
+                             amount=amount)
+            for ingredient, amount in zip([salt, milk], amounts)
+        )
+        if name != 'Каша':
+            PurchaseList.objects.create(user=user, recipe=recipe)
+    return user
+
+
+class DownloadPurchaseListTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = fill_purchase_list()
+
+    def download(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_amounts_are_summed_per_ingredient(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(
+            self.download().splitlines(),
+            ['молоко (мл) — 600 ', 'соль (г) — 7 ', 'Приятных покупок!']
+        )
+
+    def test_queries(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(1):
+            self.download()
+
+    def test_empty_list(self):
+        self.client.force_authenticate(
+            User.objects.create(email='other@test.ru', username='other')
+        )
+        self.assertEqual(self.download().splitlines(), ['Приятных покупок!'])
+
+    def test_anonymous(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ASGIDownloadTests(APITransactionTestCase):
+    def setUp(self):
+        self.user = fill_purchase_list()
+
+    @async_to_sync
+    async def download(self, token):
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': '/api/recipes/download_shopping_cart/',
+            'query_string': b'',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Token {token.key}'.encode()),
+            ],
+            'server': ('testserver', 80),
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output()
+        body = b''
+        message = {'more_body': True}
+        while message.get('more_body'):
+            message = await communicator.receive_output()
+            body += message.get('body', b'')
+        await communicator.wait()
+        return start['status'], body.decode()
+
+    def test_streams_under_asgi(self):
+        status_code, body = self.download(
+            Token.objects.create(user=self.user)
+        )
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            body.splitlines(),
+            ['молоко (мл) — 600 ', 'соль (г) — 7 ', 'Приятных покупок!']
+        )
@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from recipes.images import wait_for_variants
+from recipes.models import Ingredient, Recipe, Tag
+
+from .test_recipes import image_base64
+
+User = get_user_model()
+
+
+class ImageVariantTests(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create(
+            email='user@test.ru', username='user'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast'
+        )
+        self.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+
+    def create_recipe(self):
+        response = self.client.post('/api/recipes/', {
+            'name': 'Салат',
+            'text': 'Описание',
+            'cooking_time': 5,
+            'image': image_base64(),
+            'tags': [self.tag.pk],
+            'ingredients': [{'id': self.ingredient.pk, 'amount': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        wait_for_variants()
+        return Recipe.objects.get(pk=response.data['id'])
+
+    def test_variants_are_generated(self):
+        recipe = self.create_recipe()
+        for variant in ['thumbnail', 'card', 'full']:
+            self.assertIn(
+                f'_{variant}.', getattr(recipe, f'image_{variant}').name
+            )
+
+    def test_list_serves_card_and_detail_serves_full_image(self):
+        recipe = self.create_recipe()
+        response = self.client.get('/api/recipes/')
+        listed, = response.json()['results']
+        self.assertTrue(listed['image'].endswith(recipe.image_card.url))
+        response = self.client.get(f'/api/recipes/{recipe.pk}/')
+        self.assertTrue(
+            response.data['image'].endswith(recipe.image_full.url)
+        )
+        self.assertNotIn('image_full', response.data)
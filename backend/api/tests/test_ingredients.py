@@ -0,0 +1,40 @@
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient
+
+
+class IngredientSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ['Сахарная пудра', 'тростниковый сахар', 'соль',
+                         'сахар', 'ванильный сахар']
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def names(self, query):
+        response = self.client.get('/api/ingredients/', {'name': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['name'] for row in response.json()]
+
+    def test_prefix_matches_come_before_substring_matches(self):
+        self.assertEqual(
+            self.names('САХ'),
+            ['сахар', 'Сахарная пудра', 'ванильный сахар',
+             'тростниковый сахар']
+        )
+
+    def test_no_matches(self):
+        self.assertEqual(self.names('перец'), [])
+
+    def test_empty_query_lists_all_by_name(self):
+        self.assertEqual(
+            self.names(''),
+            ['ванильный сахар', 'сахар', 'Сахарная пудра', 'соль',
+             'тростниковый сахар']
+        )
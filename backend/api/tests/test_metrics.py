@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import Tag
+
+User = get_user_model()
+
+
+class MetricsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='user@test.ru', username='user'
+        )
+        cls.admin = User.objects.create(
+            email='admin@test.ru', username='admin', is_staff=True
+        )
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast')
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_anonymous_is_rejected(self):
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_regular_user_is_rejected(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_admin_reads_metrics(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'foodgram_requests_total', response.content)
+
+    def test_requests_and_queries_are_counted_per_view(self):
+        labels = {'view': 'users_subs'}
+        requests = self.sample(
+            'foodgram_requests_total', method='GET', status='200', **labels
+        )
+        queries = self.sample('foodgram_db_queries_total', **labels)
+        latency = self.sample(
+            'foodgram_request_duration_seconds_count', **labels
+        )
+        self.client.force_authenticate(self.user)
+        self.client.get('/api/users/subscriptions/')
+        self.assertEqual(
+            self.sample(
+                'foodgram_requests_total', method='GET', status='200',
+                **labels
+            ),
+            requests + 1
+        )
+        self.assertEqual(
+            self.sample('foodgram_db_queries_total', **labels), queries + 1
+        )
+        self.assertEqual(
+            self.sample('foodgram_request_duration_seconds_count', **labels),
+            latency + 1
+        )
@@ -0,0 +1,459 @@
+import base64
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from api import async_views
+from api.cache import recipe_cache
+from recipes.models import (Favorite, Ingredient, IngredientRecipe,
+                            PurchaseList, Recipe, Subscribe, Tag)
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_base64():
+    buffer = BytesIO()
+    Image.new('RGB', (8, 8), 'orange').save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+class RecipeTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='user@test.ru', username='user'
+        )
+        cls.author = User.objects.create(
+            email='author@test.ru', username='author'
+        )
+        cls.tags = [
+            Tag.objects.create(name='Завтрак', color='#E26C2D',
+                               slug='breakfast'),
+            Tag.objects.create(name='Обед', color='#49B64E', slug='lunch'),
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name='соль', measurement_unit='г'),
+            Ingredient.objects.create(name='сахар', measurement_unit='г'),
+        ]
+        now = timezone.now()
+        cls.recipes = []
+        for i, name in enumerate(
+                ['Борщ со сметаной', 'Блины на молоке', 'Омлет',
+                 'Сырники', 'Плов']):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=name, text='Описание',
+                cooking_time=10
+            )
+            recipe.tags.set([cls.tags[i % 2]])
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(recipe=recipe, ingredient=ingredient,
+                                 amount=i + 1)
+                for ingredient in cls.ingredients
+            )
+            cls.recipes.append(recipe)
+        for i, recipe in enumerate(cls.recipes):
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(days=i)
+            )
+
+    def setUp(self):
+        cache.clear()
+
+
+class RecipeListTests(RecipeTestCase):
+    def test_list_is_ordered_by_pub_date(self):
+        response = self.client.get('/api/recipes/?limit=10')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [recipe.pk for recipe in self.recipes]
+        )
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        self.client.force_authenticate(self.user)
+        for limit in [1, len(self.recipes)]:
+            with self.assertNumQueries(4):
+                response = self.client.get(f'/api/recipes/?limit={limit}')
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_detail_queries(self):
+        self.client.force_authenticate(self.user)
+        recipe = self.recipes[0]
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/recipes/{recipe.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {item['id']: item['amount']
+             for item in response.data['ingredients']},
+            {ingredient.pk: 1 for ingredient in self.ingredients}
+        )
+        self.assertFalse(response.data['is_favorited'])
+        self.assertEqual(response.data['author']['id'], self.author.pk)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeWriteTests(RecipeTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def payload(self, ingredients, tags=None):
+        return {
+            'name': 'Салат',
+            'text': 'Описание',
+            'cooking_time': 5,
+            'image': image_base64(),
+            'tags': tags or [self.tags[0].pk],
+            'ingredients': ingredients,
+        }
+
+    def test_create_merges_duplicate_ingredients(self):
+        salt, sugar = self.ingredients
+        response = self.client.post('/api/recipes/', self.payload([
+            {'id': salt.pk, 'amount': 10},
+            {'id': sugar.pk, 'amount': 5},
+            {'id': salt.pk, 'amount': 15},
+        ]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            dict(IngredientRecipe.objects.filter(
+                recipe_id=response.data['id']
+            ).values_list('ingredient_id', 'amount')),
+            {salt.pk: 25, sugar.pk: 5}
+        )
+        self.assertEqual(
+            {item['id']: item['amount']
+             for item in response.data['ingredients']},
+            {salt.pk: 25, sugar.pk: 5}
+        )
+
+    def test_create_with_unknown_ingredient(self):
+        response = self.client.post('/api/recipes/', self.payload([
+            {'id': self.ingredients[0].pk, 'amount': 10},
+            {'id': 999999, 'amount': 5},
+        ]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('999999', str(response.data['ingredients']))
+        self.assertFalse(Recipe.objects.filter(name='Салат').exists())
+
+    def test_create_with_unknown_tag(self):
+        response = self.client.post('/api/recipes/', self.payload(
+            [{'id': self.ingredients[0].pk, 'amount': 10}], tags=[999999]
+        ), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', response.data)
+
+    def test_create_sees_ingredient_added_after_snapshot(self):
+        self.client.get('/api/ingredients/')
+        Ingredient.objects.bulk_create(
+            [Ingredient(name='перец', measurement_unit='г')]
+        )
+        pepper = Ingredient.objects.get(name='перец')
+        response = self.client.post('/api/recipes/', self.payload(
+            [{'id': pepper.pk, 'amount': 1}]
+        ), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_update_replaces_ingredients(self):
+        salt, sugar = self.ingredients
+        recipe = Recipe.objects.create(
+            author=self.user, name='Суп', text='Описание', cooking_time=5
+        )
+        IngredientRecipe.objects.create(
+            recipe=recipe, ingredient=salt, amount=1
+        )
+        response = self.client.patch(f'/api/recipes/{recipe.pk}/', {
+            'ingredients': [{'id': sugar.pk, 'amount': 3}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(recipe.ingredientrecipe_set.values_list(
+                'ingredient_id', 'amount'
+            )),
+            [(sugar.pk, 3)]
+        )
+
+    def test_update_keeps_unchanged_rows(self):
+        salt, sugar = self.ingredients
+        recipe = Recipe.objects.create(
+            author=self.user, name='Суп', text='Описание', cooking_time=5
+        )
+        row = IngredientRecipe.objects.create(
+            recipe=recipe, ingredient=salt, amount=1
+        )
+        response = self.client.patch(f'/api/recipes/{recipe.pk}/', {
+            'ingredients': [{'id': salt.pk, 'amount': 1},
+                            {'id': sugar.pk, 'amount': 3}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            dict(recipe.ingredientrecipe_set.values_list(
+                'ingredient_id', 'pk'
+            ))[salt.pk],
+            row.pk
+        )
+
+
+class CursorPaginationTests(RecipeTestCase):
+    def test_walks_all_pages(self):
+        seen = []
+        url = '/api/recipes/?cursor=&limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, [recipe.pk for recipe in self.recipes])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [recipe.pk for recipe in self.recipes[2:4]]
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/recipes/?cursor=invalid')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_queries_do_not_depend_on_page_size(self):
+        self.client.force_authenticate(self.user)
+        for limit in [1, len(self.recipes)]:
+            with self.assertNumQueries(3):
+                response = self.client.get(
+                    f'/api/recipes/?cursor=&limit={limit}'
+                )
+            self.assertEqual(len(response.data['results']), limit)
+
+
+class AnonymousCacheTests(RecipeTestCase):
+    def test_list_is_cached(self):
+        first = self.client.get('/api/recipes/')
+        second = self.client.get('/api/recipes/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.json(), second.json())
+
+    def test_edit_invalidates_list_and_detail(self):
+        recipe = self.recipes[0]
+        for url in ['/api/recipes/', f'/api/recipes/{recipe.pk}/']:
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.name = 'Щи'
+            recipe.save()
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'][0]['name'], 'Щи')
+        response = self.client.get(f'/api/recipes/{recipe.pk}/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_generations_are_shared_between_processes(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        other_process = FileBasedCache(location, {})
+        key = recipe_cache.global_generation
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }}):
+            recipe_cache.generations(key)
+            with self.captureOnCommitCallbacks(execute=True):
+                recipe_cache.invalidate()
+            self.assertEqual(
+                str(other_process.get(key)), recipe_cache.generations(key)
+            )
+
+
+class ConditionalTests(RecipeTestCase):
+    def assertNotModified(self, response, etag):
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('Authorization', response['Vary'])
+
+    def test_recipe_detail_not_modified(self):
+        url = f'/api/recipes/{self.recipes[0].pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotModified(response, etag)
+
+    def test_recipe_detail_changes_after_edit(self):
+        recipe = self.recipes[0]
+        url = f'/api/recipes/{recipe.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.name = 'Щи'
+            recipe.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['name'], 'Щи')
+
+    def test_recipe_detail_changes_after_tag_rename(self):
+        url = f'/api/recipes/{self.recipes[0].pk}/'
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tags[0].name = 'Поздний завтрак'
+            self.tags[0].save()
+        response = self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()['tags'][0]['name'], 'Поздний завтрак'
+        )
+
+    def test_etag_depends_on_user(self):
+        url = f'/api/recipes/{self.recipes[0].pk}/'
+        etag = self.client.get(url)['ETag']
+        self.client.force_authenticate(self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_tags_not_modified_until_change(self):
+        etag = self.client.get('/api/tags/')['ETag']
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertNotModified(response, etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Ужин', color='#8775D2', slug='dinner')
+        response = self.client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 3)
+
+    def test_async_tags_not_modified(self):
+        factory = RequestFactory()
+        view = async_to_sync(async_views.tag_list)
+        etag = view(factory.get('/api/tags/'))['ETag']
+        response = view(factory.get('/api/tags/', HTTP_IF_NONE_MATCH=etag))
+        self.assertNotModified(response, etag)
+
+
+class RecipeFilterTests(RecipeTestCase):
+    def ids(self, query, status_code=status.HTTP_200_OK):
+        response = self.client.get(f'/api/recipes/?limit=10&{query}')
+        self.assertEqual(response.status_code, status_code)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_filter_by_tags(self):
+        self.assertEqual(
+            self.ids('tags=lunch'),
+            [recipe.pk for recipe in self.recipes[1::2]]
+        )
+
+    def test_filter_by_several_tags_has_no_duplicates(self):
+        for recipe in self.recipes:
+            recipe.tags.set(self.tags)
+        self.assertEqual(
+            self.ids('tags=lunch&tags=breakfast'),
+            [recipe.pk for recipe in self.recipes]
+        )
+
+    def test_filter_by_unknown_tag(self):
+        response = self.client.get('/api/recipes/?tags=unknown')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_by_author(self):
+        recipe = Recipe.objects.create(
+            author=self.user, name='Суп', text='Описание', cooking_time=5
+        )
+        self.assertEqual(self.ids(f'author={self.user.pk}'), [recipe.pk])
+
+    def test_user_relation_filters(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        PurchaseList.objects.create(user=self.user, recipe=self.recipes[1])
+        self.assertEqual(self.ids('is_favorited=1'), [])
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(self.ids('is_favorited=1'), [self.recipes[0].pk])
+        self.assertEqual(
+            self.ids('is_in_shopping_cart=1&tags=lunch'),
+            [self.recipes[1].pk]
+        )
+        self.assertEqual(
+            self.ids('is_favorited=0'),
+            [recipe.pk for recipe in self.recipes]
+        )
+
+    def test_queries_do_not_depend_on_tags(self):
+        self.client.force_authenticate(self.user)
+        self.ids('tags=lunch')
+        for query in ['tags=lunch', 'tags=lunch&tags=breakfast']:
+            with self.assertNumQueries(4):
+                self.ids(f'{query}&is_favorited=0')
+
+
+class RecipeSearchTests(RecipeTestCase):
+    def ids(self, query):
+        response = self.client.get(f'/api/recipes/?limit=10&{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_search(self):
+        self.assertEqual(self.ids('search=блины'), [self.recipes[1].pk])
+        self.assertEqual(self.ids('search=пицца'), [])
+
+    def test_search_follows_renames(self):
+        recipe = self.recipes[2]
+        recipe.name = 'Яичница'
+        recipe.save()
+        self.assertEqual(self.ids('search=яичница'), [recipe.pk])
+
+    def test_search_with_tags(self):
+        self.assertEqual(self.ids('search=омлет&tags=breakfast'),
+                         [self.recipes[2].pk])
+        self.assertEqual(self.ids('search=омлет&tags=lunch'), [])
+
+    def test_search_rejects_cursor(self):
+        response = self.client.get('/api/recipes/?search=омлет&cursor=')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.json())
+
+
+class FeedTests(RecipeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def ids(self, query=''):
+        response = self.client.get(f'/api/recipes/feed/?limit=10{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_feed_receives_new_recipes(self):
+        Subscribe.objects.create(user=self.user, author=self.author)
+        recipe = Recipe.objects.create(
+            author=self.author, name='Новый', text='Описание',
+            cooking_time=5
+        )
+        self.assertEqual(
+            self.ids(), [recipe.pk] + [recipe.pk for recipe in self.recipes]
+        )
+
+    def test_feed_of_other_authors_is_empty(self):
+        self.assertEqual(self.ids(), [])
+
+    def test_feed_queries(self):
+        Subscribe.objects.create(user=self.user, author=self.author)
+        with self.assertNumQueries(4):
+            self.ids()
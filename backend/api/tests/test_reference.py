@@ -0,0 +1,44 @@
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import TestCase, override_settings
+
+from api.cache import reference_versions
+from api.reference import IngredientTable
+from recipes.models import Ingredient
+
+
+class ReferenceTableTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+
+    def names(self, table):
+        return [row['name'] for row in table.search('')]
+
+    def test_snapshot_is_reused_until_version_changes(self):
+        table = IngredientTable()
+        self.assertEqual(self.names(table), ['соль'])
+        Ingredient.objects.create(name='сахар', measurement_unit='г')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(table), ['соль'])
+        with self.captureOnCommitCallbacks(execute=True):
+            reference_versions.bump('ingredients')
+        self.assertEqual(self.names(table), ['сахар', 'соль'])
+
+    def test_version_bumps_reach_other_processes(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }}):
+            table = IngredientTable()
+            self.assertEqual(self.names(table), ['соль'])
+            Ingredient.objects.create(name='сахар', measurement_unit='г')
+            FileBasedCache(location, {}).set(
+                reference_versions.key('ingredients'), 1, None
+            )
+            self.assertEqual(self.names(table), ['сахар', 'соль'])
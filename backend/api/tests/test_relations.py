@@ -0,0 +1,155 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite, FeedItem, PurchaseList, Recipe, Subscribe
+
+User = get_user_model()
+
+
+class RelationTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='user@test.ru', username='user'
+        )
+        cls.author = User.objects.create(
+            email='author@test.ru', username='author'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {i}', text='Описание',
+                cooking_time=10
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def counter(self, recipe, field):
+        return Recipe.objects.values_list(field, flat=True).get(pk=recipe.pk)
+
+
+class ToggleTests(RelationTestCase):
+    def check_toggle(self, path, model, field):
+        recipe = self.recipes[0]
+        url = f'/api/recipes/{recipe.pk}/{path}/'
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_201_CREATED
+        )
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(model.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self.counter(recipe, field), 1)
+        for queries in [2, 1]:
+            with self.assertNumQueries(queries):
+                response = self.client.delete(url)
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(model.objects.filter(user=self.user).exists())
+        self.assertEqual(self.counter(recipe, field), 0)
+
+    def test_favorite_toggle_is_idempotent(self):
+        self.check_toggle('favorite', Favorite, 'favorites_count')
+
+    def test_shopping_cart_toggle_is_idempotent(self):
+        self.check_toggle('shopping_cart', PurchaseList, 'in_carts_count')
+
+    def test_unknown_recipe(self):
+        response = self.client.get('/api/recipes/0/favorite/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_subscribe_toggle_fills_and_prunes_feed(self):
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_201_CREATED
+        )
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(Subscribe.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            FeedItem.objects.filter(user=self.user).count(), len(self.recipes)
+        )
+        for queries in [2, 1]:
+            with self.assertNumQueries(queries):
+                response = self.client.delete(url)
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(FeedItem.objects.filter(user=self.user).exists())
+
+    def test_subscribe_to_self(self):
+        response = self.client.get(f'/api/users/{self.user.pk}/subscribe/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Subscribe.objects.exists())
+
+
+class BulkTests(RelationTestCase):
+    def ids(self, *recipes):
+        return {'recipes': [recipe.pk for recipe in recipes]}
+
+    def test_bulk_add_and_remove(self):
+        first, second, _ = self.recipes
+        response = self.client.post(
+            '/api/recipes/favorite/', self.ids(first, second, first),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['id'] for item in response.data], [first.pk, second.pk]
+        )
+        self.assertEqual(self.counter(first, 'favorites_count'), 1)
+        response = self.client.post(
+            '/api/recipes/favorite/', self.ids(first), format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 2)
+        response = self.client.delete(
+            '/api/recipes/favorite/', self.ids(first, second), format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+        self.assertEqual(self.counter(first, 'favorites_count'), 0)
+        self.assertEqual(self.counter(second, 'favorites_count'), 0)
+
+    def test_bulk_add_only_counts_new_rows(self):
+        first, second, _ = self.recipes
+        PurchaseList.objects.create(user=self.user, recipe=first)
+        response = self.client.post(
+            '/api/recipes/shopping_cart/', self.ids(first, second),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.counter(first, 'in_carts_count'), 1)
+        self.assertEqual(self.counter(second, 'in_carts_count'), 1)
+
+    def test_bulk_queries(self):
+        PurchaseList.objects.bulk_create(
+            PurchaseList(user=self.user, recipe=recipe)
+            for recipe in self.recipes
+        )
+        with self.assertNumQueries(5):
+            response = self.client.delete(
+                '/api/recipes/shopping_cart/', self.ids(*self.recipes),
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for recipe in self.recipes:
+            self.assertEqual(self.counter(recipe, 'in_carts_count'), 0)
+        with self.assertNumQueries(4):
+            self.client.delete(
+                '/api/recipes/shopping_cart/', self.ids(*self.recipes),
+                format='json'
+            )
+
+    def test_bulk_unknown_recipes(self):
+        response = self.client.post(
+            '/api/recipes/favorite/',
+            {'recipes': [self.recipes[0].pk, 0, 999999]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_bulk_empty_list(self):
+        response = self.client.post(
+            '/api/recipes/favorite/', {'recipes': []}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
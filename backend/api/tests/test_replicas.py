@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+
+from api.cache import recipe_cache
+from api.checks import check_replica_pin_cache
+from api.replicas import (ReadAfterWriteMiddleware, ReplicaRouter, is_pinned,
+                          pin, primary_reads, read_database, reads_from,
+                          replica_for)
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_follow_context(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Recipe))
+        with reads_from('replica_0'):
+            self.assertEqual(router.db_for_read(Recipe), 'replica_0')
+            with primary_reads():
+                self.assertIsNone(router.db_for_read(Recipe))
+            self.assertEqual(router.db_for_read(Recipe), 'replica_0')
+        self.assertIsNone(router.db_for_read(Recipe))
+
+    def test_writes_go_to_primary(self):
+        with reads_from('replica_0'):
+            self.assertEqual(
+                ReplicaRouter().db_for_write(Recipe), DEFAULT_DB_ALIAS
+            )
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaSelectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='user@test.ru', username='user'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, method='get', user=None):
+        request = getattr(self.factory, method)('/api/recipes/')
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_safe_reads_use_replica(self):
+        self.assertEqual(replica_for(self.request()), 'replica_0')
+        self.assertEqual(
+            replica_for(self.request(user=self.user)), 'replica_0'
+        )
+
+    def test_unsafe_methods_use_primary(self):
+        self.assertIsNone(replica_for(self.request('post', self.user)))
+
+    def test_pinned_user_reads_primary(self):
+        pin(self.user)
+        self.assertIsNone(replica_for(self.request(user=self.user)))
+        self.assertEqual(replica_for(self.request()), 'replica_0')
+
+    def test_middleware_pins_after_write(self):
+        def write(request):
+            Tag.objects.create(name='Обед', color='#49B64E', slug='lunch')
+            return HttpResponse()
+
+        ReadAfterWriteMiddleware(write)(self.request('post', self.user))
+        self.assertTrue(is_pinned(self.user))
+
+    def test_middleware_skips_reads(self):
+        def read(request):
+            list(Tag.objects.all())
+            return HttpResponse()
+
+        ReadAfterWriteMiddleware(read)(self.request(user=self.user))
+        self.assertFalse(is_pinned(self.user))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_pins_without_replicas(self):
+        def write(request):
+            Tag.objects.create(name='Обед', color='#49B64E', slug='lunch')
+            return HttpResponse()
+
+        ReadAfterWriteMiddleware(write)(self.request('post', self.user))
+        self.assertFalse(is_pinned(self.user))
+
+
+class ReplicaCacheTests(SimpleTestCase):
+    @override_settings(RECIPES_CACHE_TIMEOUT=300,
+                       RECIPES_REPLICA_CACHE_TIMEOUT=5)
+    def test_replica_responses_expire_sooner(self):
+        self.assertEqual(recipe_cache.timeout(), 300)
+        token = read_database.set('replica_0')
+        try:
+            self.assertEqual(recipe_cache.timeout(), 5)
+        finally:
+            read_database.reset(token)
+
+    def test_pin_cache_check(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(check_replica_pin_cache(None), [])
+        with override_settings(DATABASE_REPLICAS=['replica_0']):
+            errors = check_replica_pin_cache(None)
+        self.assertEqual([error.id for error in errors], ['api.E001'])
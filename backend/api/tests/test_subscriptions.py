@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import Recipe, Subscribe
+
+User = get_user_model()
+
+
+class SubscriptionsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='user@test.ru', username='user'
+        )
+        cls.author = User.objects.create(
+            email='author@test.ru', username='author'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {i}', text='Описание',
+                cooking_time=10
+            )
+            for i in range(3)
+        ]
+        Subscribe.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get_recipes(self, query=''):
+        response = self.client.get(f'/api/users/subscriptions/{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        author, = response.data['results']
+        self.assertTrue(author['is_subscribed'])
+        self.assertEqual(author['recipes_count'], len(self.recipes))
+        return author['recipes']
+
+    def test_recipes_limit(self):
+        recipes = self.get_recipes('?recipes_limit=2')
+        self.assertEqual(
+            [recipe['id'] for recipe in recipes],
+            [recipe.pk for recipe in reversed(self.recipes)][:2]
+        )
+
+    def test_recipes_limit_zero(self):
+        self.assertEqual(self.get_recipes('?recipes_limit=0'), [])
+
+    def test_invalid_recipes_limit(self):
+        self.assertEqual(len(self.get_recipes('?recipes_limit=x')), 3)
+
+    def test_queries_do_not_depend_on_authors(self):
+        with self.assertNumQueries(3):
+            self.get_recipes('?recipes_limit=2')
+        for i in range(3):
+            author = User.objects.create(
+                email=f'author{i}@test.ru', username=f'author{i}'
+            )
+            Recipe.objects.create(
+                author=author, name='Рецепт', text='Описание',
+                cooking_time=10
+            )
+            Subscribe.objects.create(user=self.user, author=author)
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                '/api/users/subscriptions/?recipes_limit=2'
+            )
+        self.assertEqual(len(response.data['results']), 4)
@@ -0,0 +1,101 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def png_file(name='photo.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (8, 8), 'orange').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MultipartUploadTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='user@test.ru', username='user'
+        )
+        cls.tags = [
+            Tag.objects.create(name='Завтрак', color='#E26C2D',
+                               slug='breakfast'),
+            Tag.objects.create(name='Обед', color='#49B64E', slug='lunch'),
+        ]
+        cls.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def post(self, image, ingredients=None):
+        return self.client.post('/api/recipes/', {
+            'name': 'Салат',
+            'text': 'Описание',
+            'cooking_time': 5,
+            'image': image,
+            'tags': [tag.pk for tag in self.tags],
+            'ingredients': ingredients or json.dumps(
+                [{'id': self.ingredient.pk, 'amount': 10}]
+            ),
+        }, format='multipart')
+
+    def test_create_from_multipart(self):
+        response = self.post(png_file())
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(pk=response.data['id'])
+        self.assertTrue(recipe.image.name.endswith('.png'))
+        self.assertNotIn('photo', recipe.image.name)
+        self.assertEqual(
+            sorted(recipe.tags.values_list('pk', flat=True)),
+            [tag.pk for tag in self.tags]
+        )
+        self.assertEqual(
+            list(recipe.ingredientrecipe_set.values_list(
+                'ingredient_id', 'amount'
+            )),
+            [(self.ingredient.pk, 10)]
+        )
+
+    def test_rejects_non_image(self):
+        response = self.post(SimpleUploadedFile(
+            'photo.png', b'<?php echo 1; ?>', 'image/png'
+        ))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['image'], ['Загрузите корректное изображение.']
+        )
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(RECIPE_IMAGE_MAX_SIZE=64)
+    def test_rejects_large_image(self):
+        response = self.post(png_file())
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Размер изображения', response.data['image'][0])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_rejects_malformed_ingredients(self):
+        response = self.post(png_file(), ingredients='[{')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ingredients', response.data)
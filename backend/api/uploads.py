@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.files.uploadhandler import (SkipFile,
+                                             TemporaryFileUploadHandler)
+
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',
+    b'\x89PNG\r\n\x1a\n',
+    b'GIF87a',
+    b'GIF89a',
+    b'RIFF',
+)
+
+
+class RecipeImageUploadHandler(TemporaryFileUploadHandler):
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.field_name = field_name
+
+    def reject(self, message):
+        if not hasattr(self.request, 'upload_errors'):
+            self.request.upload_errors = {}
+        self.request.upload_errors[self.field_name] = [message]
+        raise SkipFile()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and not raw_data.startswith(IMAGE_SIGNATURES):
+            self.reject('Загрузите корректное изображение.')
+        if start + len(raw_data) > settings.RECIPE_IMAGE_MAX_SIZE:
+            self.reject(
+                'Размер изображения не должен превышать '
+                f'{settings.RECIPE_IMAGE_MAX_SIZE // 2 ** 20} МБ.'
+            )
+        return super().receive_data_chunk(raw_data, start)
@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (DownloadPurchaseList, FavoriteViewSet, IngredientViewSet,
-                    PurchaseListView, RecipeViewSet, SubscribeView, TagViewSet,
-                    show_subscribs)
+from . import async_views
+from .metrics import metrics_view
+from .views import (DownloadPurchaseList, FavoriteBulkView, FavoriteViewSet,
+                    IngredientViewSet, PurchaseListBulkView, PurchaseListView,
+                    RecipeViewSet, SubscribeView, TagViewSet, show_subscribs)
 
 router = DefaultRouter()
 
@@ -12,6 +15,7 @@ router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 
 urlpatterns = [
+    path('metrics', metrics_view, name='metrics'),
     path('users/subscriptions/',
          show_subscribs, name='users_subs'),
     path('users/<int:user_id>/subscribe/',
@@ -20,7 +24,22 @@ urlpatterns = [
          FavoriteViewSet.as_view(), name='add_recipe_to_favorite'),
     path('recipes/<int:recipe_id>/shopping_cart/',
          PurchaseListView.as_view(), name='add_recipe_to_shopping_cart'),
+    path('recipes/favorite/',
+         FavoriteBulkView.as_view(), name='bulk_favorite'),
+    path('recipes/shopping_cart/',
+         PurchaseListBulkView.as_view(), name='bulk_shopping_cart'),
     path('recipes/download_shopping_cart/',
          DownloadPurchaseList.as_view(), name='dowload_shopping_cart'),
     path('', include(router.urls))
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns[-1:-1] = [
+        path('tags/', async_views.tag_list, name='tags-list'),
+        path('tags/<int:pk>/', async_views.tag_detail, name='tags-detail'),
+        path('ingredients/',
+             async_views.ingredient_list, name='ingredients-list'),
+        path('ingredients/<int:pk>/',
+             async_views.ingredient_detail, name='ingredients-detail'),
+        path('recipes/', async_views.recipe_list, name='recipes-list'),
+    ]
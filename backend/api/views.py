@@ -1,69 +1,180 @@
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Sum
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import AllowAny
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
-from recipes.models import (Favorite, Ingredient, PurchaseList, Recipe,
-                            Subscribe, Tag)
+from recipes.counters import change_counter, count_of
+from recipes.feed import backfill, prune
+from recipes.models import (Favorite, Ingredient, IngredientRecipe,
+                            PurchaseList, Recipe, Subscribe, Tag)
 
+from . import reference
+from .cache import recipe_cache
+from .conditions import (ReferenceConditionalMixin, add_validators,
+                         not_modified, recipe_validators)
 from .filters import RecipeFilter, SearchFilter
-from .paginators import PageNumberPaginatorModified
+from .paginators import PageNumberPaginatorModified, PubDateCursorPagination
 from .permissions import AuthorOrReadOnly
-from .serializers import (CreateRecipeSerializer, FavoriteSerializer,
-                          IngredientSerializer, PurchaseListSerializer,
-                          RecipeListSerializer, SubscribersSerializer,
-                          SubscribeSerializer, TagSerializer)
+from .replicas import ReplicaReadMixin, replica_reads
+from .serializers import (CreateRecipeSerializer, IngredientSerializer,
+                          RecipeDetailSerializer, RecipeIdsSerializer,
+                          RecipeListSerializer, RecipeShortSerializer,
+                          SubscribersSerializer, TagSerializer)
+from .uploads import RecipeImageUploadHandler
 
 User = get_user_model()
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ReplicaReadMixin, ReferenceConditionalMixin,
+                 viewsets.ReadOnlyModelViewSet):
+    reference_name = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
 
+    def get_queryset(self):
+        return reference.tags.all()
 
-class RecipeViewSet(viewsets.ModelViewSet):
+    def get_object(self):
+        try:
+            tag = reference.tags.get(int(self.kwargs[self.lookup_field]))
+        except ValueError:
+            tag = None
+        if tag is None:
+            raise Http404
+        self.check_object_permissions(self.request, tag)
+        return tag
+
+
+class RecipeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = CreateRecipeSerializer
     permission_classes = [AuthorOrReadOnly]
     filter_backends = [DjangoFilterBackend]
-    filter_class = RecipeFilter
+    filterset_class = RecipeFilter
     pagination_class = PageNumberPaginatorModified
+    parser_classes = [JSONParser, MultiPartParser]
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [RecipeImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if (PubDateCursorPagination.cursor_query_param
+                    in self.request.query_params):
+                if (self.action == 'list'
+                        and 'search' in self.request.query_params):
+                    raise ValidationError({
+                        'cursor': [
+                            'Курсорная пагинация не сохраняет порядок по '
+                            'релевантности, используйте page вместе с search.'
+                        ]
+                    })
+                self._paginator = PubDateCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_queryset(self):
+        if self.action in ['list', 'retrieve', 'feed']:
+            return Recipe.objects.with_related().with_user_flags(
+                self.request.user
+            )
+        return Recipe.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return super().list(request, *args, **kwargs)
+        return recipe_cache.respond(
+            recipe_cache.list_key(request),
+            lambda: super(RecipeViewSet, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        etag, last_modified = recipe_validators(request, pk)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        if request.user.is_anonymous:
+            response = recipe_cache.respond(
+                recipe_cache.detail_key(request, pk),
+                lambda: super(RecipeViewSet, self).retrieve(
+                    request, *args, **kwargs
+                )
+            )
+        else:
+            response = super().retrieve(request, *args, **kwargs)
+        return add_validators(response, etag, last_modified)
+
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        queryset = self.get_queryset().filter(
+            feed_items__user=request.user
+        ).order_by('-feed_items__pub_date', '-feed_items__recipe')
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        return Response(recipe_cache.stats())
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
     def get_serializer_class(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'feed']:
             return RecipeListSerializer
+        if self.action == 'retrieve':
+            return RecipeDetailSerializer
         return CreateRecipeSerializer
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReplicaReadMixin, ReferenceConditionalMixin,
+                        viewsets.ReadOnlyModelViewSet):
+    reference_name = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [AllowAny, ]
-    filter_backends = [SearchFilter]
-    search_fields = ['name', ]
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(request, lambda: Response(
+            reference.ingredients.search(
+                request.query_params.get(SearchFilter.search_param, '')
+            )
+        ))
 
 
 @api_view(['get'])
+@replica_reads
 def show_subscribs(request):
-    user_obj = User.objects.filter(following__user=request.user)
+    user_obj = SubscribersSerializer.setup_queryset(
+        User.objects.filter(following__user=request.user).order_by(
+            *User._meta.ordering
+        ),
+        request
+    )
     paginator = PageNumberPagination()
     paginator.page_size = 10
     result_page = paginator.paginate_queryset(user_obj, request)
     serializer = SubscribersSerializer(
         result_page,
         many=True,
-        context={'current_user': request.user}
+        context={'request': request}
     )
     return paginator.get_paginated_response(serializer.data)
 
@@ -71,113 +182,146 @@ def show_subscribs(request):
 class SubscribeView(APIView):
 
     def get(self, request, user_id):
-        user = request.user
-        data = {
-            'user': user.id,
-            'author': user_id
-        }
-        serializer = SubscribeSerializer(
-            data=data, context={'request': request}
+        if user_id == request.user.id:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Невозможно подписаться на себя'
+                ]
+            })
+        author = get_object_or_404(
+            SubscribersSerializer.setup_queryset(User.objects.all(), request),
+            pk=user_id
+        )
+        created = Subscribe.objects.add(user=request.user, author=author)
+        if created:
+            backfill(request.user.pk, author.pk)
+        author.is_subscribed = True
+        serializer = SubscribersSerializer(
+            author, context={'request': request}
+        )
+        return Response(
+            serializer.data,
+            status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status.HTTP_201_CREATED)
 
     def delete(self, request, user_id):
-        user = request.user
-        follow = get_object_or_404(
-            Subscribe,
-            user=user,
-            author_id=user_id
-        )
-        follow.delete()
+        if Subscribe.objects.remove(user=request.user, author_id=user_id):
+            prune(request.user.pk, user_id)
         return Response('Подписка удалена', status.HTTP_204_NO_CONTENT)
 
 
-class FavoriteViewSet(APIView):
+class RecipeRelationView(APIView):
+    model = None
+    counter = None
+    removed_message = None
 
     def get(self, request, recipe_id):
-        user = request.user.id
-        data = {
-            'user': user,
-            'recipe': recipe_id
-        }
-        serializer = FavoriteSerializer(
-            data=data, context={'request': request}
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status.HTTP_201_CREATED)
-
-    def delete(self, request, recipe_id):
-        user = request.user
-        favorite_recipe = get_object_or_404(
-            Favorite,
-            user=user,
-            recipe__id=recipe_id
+        recipe = get_object_or_404(Recipe.objects.short(), pk=recipe_id)
+        created = self.model.objects.add(user=request.user, recipe=recipe)
+        if created:
+            change_counter(Recipe, recipe.pk, self.counter, 1)
+        serializer = RecipeShortSerializer(
+            recipe, context={'request': request}
         )
-        favorite_recipe.delete()
         return Response(
-            'Рецепт удален из избранного',
-            status.HTTP_204_NO_CONTENT
+            serializer.data,
+            status.HTTP_201_CREATED if created else status.HTTP_200_OK
         )
 
+    def delete(self, request, recipe_id):
+        if self.model.objects.remove(user=request.user, recipe_id=recipe_id):
+            change_counter(Recipe, recipe_id, self.counter, -1)
+        return Response(self.removed_message, status.HTTP_204_NO_CONTENT)
 
-class PurchaseListView(APIView):
 
-    def get(self, request, recipe_id):
-        user = request.user.id
-        data = {
-            'user': user,
-            'recipe': recipe_id
-        }
-        serializer = PurchaseListSerializer(
-            data=data,
-            context={'request': request}
-        )
+class FavoriteViewSet(RecipeRelationView):
+    model = Favorite
+    counter = 'favorites_count'
+    removed_message = 'Рецепт удален из избранного'
+
+
+class PurchaseListView(RecipeRelationView):
+    model = PurchaseList
+    counter = 'in_carts_count'
+    removed_message = 'Рецепт удален из списка покупок'
+
+
+class RecipeRelationBulkView(APIView):
+    model = None
+    counter = None
+
+    def get_recipes(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status.HTTP_201_CREATED)
+        return serializer.validated_data['recipes']
 
-    def delete(self, request, recipe_id):
-        user = request.user
-        purchace_list_recipe = get_object_or_404(
-            PurchaseList,
-            user=user,
-            recipe__id=recipe_id
+    def update_counters(self, recipes):
+        Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes]).update(
+            **{self.counter: count_of(self.model, 'recipe')}
         )
-        purchace_list_recipe.delete()
-        return Response(
-            'Рецепт удален из списка покупок',
-            status.HTTP_204_NO_CONTENT
+
+    def respond(self, request, recipes, status_code):
+        serializer = RecipeShortSerializer(
+            recipes, many=True, context={'request': request}
+        )
+        return Response(serializer.data, status_code)
+
+    @transaction.atomic
+    def post(self, request):
+        recipes = self.get_recipes(request)
+        existing = set(self.model.objects.filter(
+            user=request.user, recipe__in=recipes
+        ).values_list('recipe_id', flat=True))
+        new = [recipe for recipe in recipes if recipe.pk not in existing]
+        if not new:
+            return self.respond(request, recipes, status.HTTP_200_OK)
+        self.model.objects.bulk_create(
+            [self.model(user=request.user, recipe=recipe) for recipe in new],
+            ignore_conflicts=True
         )
+        self.update_counters(new)
+        return self.respond(request, recipes, status.HTTP_201_CREATED)
+
+    @transaction.atomic
+    def delete(self, request):
+        recipes = self.get_recipes(request)
+        if self.model.objects.delete_rows(user=request.user, recipe=recipes):
+            self.update_counters(recipes)
+        return self.respond(request, recipes, status.HTTP_200_OK)
+
+
+class FavoriteBulkView(RecipeRelationBulkView):
+    model = Favorite
+    counter = 'favorites_count'
+
+
+class PurchaseListBulkView(RecipeRelationBulkView):
+    model = PurchaseList
+    counter = 'in_carts_count'
 
 
 class DownloadPurchaseList(APIView):
 
     def get(self, request):
-        shopping_cart = request.user.purchases.all()
-        purchase_list = {}
-        for purchase in shopping_cart:
-            ingredients = purchase.recipe.ingredientrecipe_set.all()
-            for ingredient in ingredients:
-                name = ingredient.ingredient.name
-                amount = ingredient.amount
-                unit = ingredient.ingredient.measurement_unit
-                if name not in purchase_list:
-                    purchase_list[name] = {
-                        'amount': amount,
-                        'unit': unit
-                    }
-                else:
-                    purchase_list[name]['amount'] = (purchase_list[name]
-                                                     ['amount'] + amount)
-        wishlist = []
-        for item in purchase_list:
-            wishlist.append(f'{item} ({purchase_list[item]["unit"]}) — '
-                            f'{purchase_list[item]["amount"]} \n')
-        wishlist.append('')
-        wishlist.append('Приятных покупок!')
-        response = HttpResponse(wishlist, 'Content-Type: application/pdf')
+        ingredients = IngredientRecipe.objects.filter(
+            recipe__customers__user=request.user
+        ).values(
+            'ingredient__name', 'ingredient__measurement_unit'
+        ).annotate(
+            total_amount=Sum('amount')
+        ).order_by('ingredient__name')
+        response = StreamingHttpResponse(
+            self.wishlist(list(ingredients)),
+            'Content-Type: application/pdf'
+        )
         response['Content-Disposition'] = 'attachment; filename="wishlist.pdf"'
         return response
+
+    @staticmethod
+    def wishlist(ingredients):
+        for item in ingredients:
+            yield (f'{item["ingredient__name"]} '
+                   f'({item["ingredient__measurement_unit"]}) — '
+                   f'{item["total_amount"]} \n')
+        yield ''
+        yield 'Приятных покупок!'
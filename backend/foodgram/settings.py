@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,6 +43,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.replicas.ReadAfterWriteMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
@@ -81,8 +83,54 @@ else:
         }
     }
 
+SQLITE = 'sqlite3' in str(DATABASES['default']['ENGINE'])
+if SQLITE:
+    DATABASES['default']['TEST'] = {
+        'NAME': f"{DATABASES['default']['NAME']}.test"
+    }
+
+REPLICA_FIELD = 'NAME' if SQLITE else 'HOST'
+DATABASE_REPLICAS = []
+for index, location in enumerate(
+    filter(None, os.environ.get('DB_REPLICAS', '').split(','))
+):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        REPLICA_FIELD: location,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+DATABASE_READ_AFTER_WRITE = int(os.environ.get('DB_READ_AFTER_WRITE', 5))
+DATABASE_PIN_CACHE_ALIAS = 'default'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', '/tmp/foodgram-cache'),
+    }
+}
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'foodgram-tests',
+    }
+}
+
+RECIPES_CACHE_ALIAS = 'default'
+RECIPES_CACHE_TIMEOUT = int(os.environ.get('RECIPES_CACHE_TIMEOUT', 300))
+RECIPES_REPLICA_CACHE_TIMEOUT = int(os.environ.get(
+    'RECIPES_REPLICA_CACHE_TIMEOUT', DATABASE_READ_AFTER_WRITE
+))
+
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+TEST_RUNNER = 'foodgram.runner.TestRunner'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -156,4 +204,18 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'backend_static')
 MEDIA_URL = '/backend_media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'backend_media')
 
+RECIPE_IMAGE_MAX_SIZE = 20 * 1024 * 1024
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_IMAGE_QUALITY = 80
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': (160, 160),
+    'card': (640, 640),
+    'full': (1600, 1600),
+}
+
+FEED_BACKFILL_SIZE = int(os.environ.get('FEED_BACKFILL_SIZE', 100))
+FEED_BATCH_SIZE = 1000
+
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,17 @@
+import os
+import shutil
+from importlib import import_module
+
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', '/tmp/foodgram-metrics'
+)
+multiprocess = import_module('prometheus_client.multiprocess')
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Favorite, PurchaseList, Recipe
+
+User = get_user_model()
+
+
+def change_counter(model, pk, field, delta):
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def count_of(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                count=Count('pk')
+            ).values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def recount_counters():
+    return {
+        'recipes': Recipe.objects.update(
+            favorites_count=count_of(Favorite, 'recipe'),
+            in_carts_count=count_of(PurchaseList, 'recipe')
+        ),
+        'users': User.objects.update(
+            recipes_count=count_of(Recipe, 'author')
+        ),
+    }
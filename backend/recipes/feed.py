@@ -0,0 +1,61 @@
+from itertools import islice
+
+from django.conf import settings
+
+from .models import FeedItem, Recipe, Subscribe
+
+
+def insert_items(items):
+    total = 0
+    while True:
+        batch = list(islice(items, settings.FEED_BATCH_SIZE))
+        if not batch:
+            return total
+        FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+
+
+def recent_recipes(author_id):
+    return list(Recipe.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_SIZE])
+
+
+def fan_out(recipe):
+    followers = Subscribe.objects.filter(
+        author_id=recipe.author_id
+    ).values_list('user_id', flat=True)
+    return insert_items(
+        FeedItem(user_id=user_id, recipe_id=recipe.pk,
+                 pub_date=recipe.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    return insert_items(
+        FeedItem(user_id=user_id, recipe_id=pk, pub_date=pub_date)
+        for pk, pub_date in recent_recipes(author_id)
+    )
+
+
+def prune(user_id, author_id):
+    return FeedItem.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()[0]
+
+
+def rebuild_feeds():
+    FeedItem.objects.all().delete()
+
+    def items():
+        current, recipes = None, []
+        for user_id, author_id in Subscribe.objects.order_by(
+                'author_id').values_list('user_id', 'author_id').iterator():
+            if author_id != current:
+                current, recipes = author_id, recent_recipes(author_id)
+            for pk, pub_date in recipes:
+                yield FeedItem(user_id=user_id, recipe_id=pk,
+                               pub_date=pub_date)
+
+    return insert_items(items())
@@ -0,0 +1,124 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+VARIANTS_DIR = 'recipes/images/variants/'
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.RECIPE_IMAGE_WORKERS,
+    thread_name_prefix='recipe-images'
+)
+pending = set()
+
+
+def variant_format():
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+def variant_prefix(image_name):
+    return f'{PurePosixPath(image_name).stem}_'
+
+
+def needs_variants(recipe):
+    return bool(recipe.image) and not (
+        recipe.image_card.name or ''
+    ).startswith(VARIANTS_DIR + variant_prefix(recipe.image.name))
+
+
+def variant_names(recipe):
+    return [
+        getattr(recipe, f'image_{variant}').name
+        for variant in settings.RECIPE_IMAGE_VARIANTS
+    ]
+
+
+def delete_files(storage, names):
+    for name in names:
+        if name:
+            storage.delete(name)
+
+
+def render_variant(image, size):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    buffer = BytesIO()
+    image_format, _ = variant_format()
+    variant.save(buffer, image_format, quality=settings.RECIPE_IMAGE_QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+def process_recipe_image(recipe_id, image_name):
+    from .models import Recipe
+
+    close_old_connections()
+    try:
+        recipe = Recipe.objects.filter(pk=recipe_id, image=image_name).first()
+        if recipe is None:
+            return
+        with recipe.image.open('rb') as source:
+            image = ImageOps.exif_transpose(Image.open(source))
+            image = image.convert(
+                'RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB'
+            )
+        image_format, extension = variant_format()
+        if image_format == 'JPEG':
+            image = image.convert('RGB')
+        prefix = variant_prefix(image_name)
+        previous = variant_names(recipe)
+        for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+            field = getattr(recipe, f'image_{variant}')
+            field.save(
+                f'{prefix}{variant}.{extension}',
+                render_variant(image, size),
+                save=False
+            )
+        if Recipe.objects.filter(pk=recipe_id, image=image_name).exists():
+            recipe.save(update_fields=[
+                *(f'image_{variant}'
+                  for variant in settings.RECIPE_IMAGE_VARIANTS),
+                'edited'
+            ])
+            delete_files(recipe.image.storage, previous)
+        else:
+            delete_files(recipe.image.storage, variant_names(recipe))
+    finally:
+        close_old_connections()
+
+
+def log_failure(recipe_id):
+    def callback(future):
+        error = future.exception()
+        if error is not None:
+            logger.error(
+                'Не удалось подготовить изображения рецепта %s', recipe_id,
+                exc_info=error
+            )
+    return callback
+
+
+def schedule_variants(recipe):
+    def submit():
+        future = executor.submit(
+            process_recipe_image, recipe.pk, recipe.image.name
+        )
+        pending.add(future)
+        future.add_done_callback(pending.discard)
+        future.add_done_callback(log_failure(recipe.pk))
+    transaction.on_commit(submit)
+
+
+def wait_for_variants(timeout=None):
+    return wait(pending.copy(), timeout)
+
+
+def discard_variants(recipe):
+    storage, names = recipe.image.storage, variant_names(recipe)
+    transaction.on_commit(lambda: delete_files(storage, names))
@@ -0,0 +1,228 @@
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, islice
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+
+from recipes.counters import recount_counters
+from recipes.feed import rebuild_feeds
+from recipes.models import (Favorite, Ingredient, IngredientRecipe,
+                            PurchaseList, Recipe, Subscribe, Tag)
+from recipes.signals import bulk_loaded
+
+User = get_user_model()
+
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+def zipf_weights(count, exponent):
+    return array('d', accumulate(
+        1 / (rank ** exponent) for rank in range(1, count + 1)
+    ))
+
+
+@contextmanager
+def manual_dates(model, *names):
+    fields = [model._meta.get_field(name) for name in names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = ('Генерирует пользователей, рецепты, подписки, избранное '
+            'и списки покупок для нагрузочного тестирования')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--subscriptions', type=int, default=20000)
+        parser.add_argument('--favorites', type=int, default=100000)
+        parser.add_argument('--purchases', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для популярности'
+        )
+        parser.add_argument('--password', default='foodgram-fake')
+        parser.add_argument('--days', type=int, default=365)
+
+    def log(self, message):
+        self.stdout.write(
+            f'[{perf_counter() - self.started:8.1f} с] {message}'
+        )
+
+    def insert(self, model, objects, ignore_conflicts=False):
+        total = 0
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                return total
+            model.objects.bulk_create(
+                batch, ignore_conflicts=ignore_conflicts
+            )
+            total += len(batch)
+
+    def new_ids(self, model, last_id):
+        return array('q', model.objects.filter(
+            pk__gt=last_id
+        ).order_by('pk').values_list('pk', flat=True).iterator())
+
+    def last_id(self, model):
+        return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+    def handle(self, *args, **options):
+        self.started = perf_counter()
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        ingredient_ids = array('q', Ingredient.objects.values_list(
+            'pk', flat=True
+        ).iterator())
+        if len(ingredient_ids) < 12:
+            raise CommandError(
+                'Сначала загрузите ингредиенты: manage.py load_ingredients.'
+            )
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS
+            )
+        tag_ids = list(Tag.objects.values_list('pk', flat=True))
+        user_ids = self.create_users(options)
+        recipe_ids = self.create_recipes(options, user_ids)
+        self.create_recipe_rows(recipe_ids, ingredient_ids, tag_ids)
+        self.create_edges(options, user_ids, recipe_ids)
+        recount_counters()
+        self.log('Счетчики пересчитаны')
+        self.log(f'Записей в лентах: {rebuild_feeds()}')
+        bulk_loaded.send(sender=Tag)
+        bulk_loaded.send(sender=Recipe)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {perf_counter() - self.started:.1f} с.'
+        ))
+
+    def create_users(self, options):
+        last_id = self.last_id(User)
+        password = make_password(options['password'])
+        self.insert(User, (
+            User(email=f'fake{number}@example.com',
+                 username=f'fake{number}', first_name='Имя',
+                 last_name=f'Фамилия {number}', password=password)
+            for number in range(last_id + 1, last_id + options['users'] + 1)
+        ))
+        user_ids = self.new_ids(User, last_id)
+        self.log(f'Пользователей: {len(user_ids)}')
+        return user_ids
+
+    def create_recipes(self, options, user_ids):
+        last_id = self.last_id(Recipe)
+        authors = zipf_weights(len(user_ids), options['skew'])
+        now = timezone.now()
+        period = options['days'] * 24 * 3600
+
+        def recipes():
+            for number in range(options['recipes']):
+                date = now - timedelta(
+                    seconds=self.random.randrange(period)
+                )
+                yield Recipe(
+                    author_id=self.random.choices(
+                        user_ids, cum_weights=authors
+                    )[0],
+                    name=f'Рецепт {last_id + number + 1}',
+                    text='Сгенерированное описание рецепта.',
+                    cooking_time=self.random.randint(5, 180),
+                    pub_date=date,
+                    edited=date
+                )
+
+        with manual_dates(Recipe, 'pub_date', 'edited'):
+            self.insert(Recipe, recipes())
+        recipe_ids = self.new_ids(Recipe, last_id)
+        self.log(f'Рецептов: {len(recipe_ids)}')
+        return recipe_ids
+
+    def create_recipe_rows(self, recipe_ids, ingredient_ids, tag_ids):
+        total = self.insert(IngredientRecipe, (
+            IngredientRecipe(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                             amount=self.random.randint(1, 500))
+            for recipe_id in recipe_ids
+            for ingredient_id in self.random.sample(
+                ingredient_ids, self.random.randint(3, 12)
+            )
+        ))
+        self.log(f'Ингредиентов в рецептах: {total}')
+        total = self.insert(Recipe.tags.through, (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in self.random.sample(
+                tag_ids, self.random.randint(1, len(tag_ids))
+            )
+        ))
+        self.log(f'Тегов в рецептах: {total}')
+
+    def distinct_targets(self, targets, weights, count, exclude):
+        chosen = set()
+        for _ in range(8):
+            if len(chosen) == count:
+                return chosen
+            chosen.update(self.random.choices(
+                targets, cum_weights=weights, k=count - len(chosen)
+            ))
+            chosen.discard(exclude)
+        rest = [target for target in targets
+                if target not in chosen and target != exclude]
+        chosen.update(self.random.sample(rest, count - len(chosen)))
+        return chosen
+
+    def edges(self, user_ids, targets, weights, total, field):
+        activity = zipf_weights(len(user_ids), 1.0)
+        scale = total / activity[-1]
+        limit = len(targets) - (field == 'author_id')
+        planned = 0
+        for user_id, cumulative in zip(user_ids, activity):
+            count = min(round(cumulative * scale) - planned, limit)
+            planned += count
+            exclude = user_id if field == 'author_id' else None
+            for target_id in self.distinct_targets(
+                    targets, weights, count, exclude):
+                yield {'user_id': user_id, field: target_id}
+
+    def create_edges(self, options, user_ids, recipe_ids):
+        shuffled = array('q', recipe_ids)
+        self.random.shuffle(shuffled)
+        popularity = zipf_weights(len(shuffled), options['skew'])
+        authors = zipf_weights(len(user_ids), options['skew'])
+        plan = (
+            (Subscribe, user_ids, authors, 'subscriptions', 'author_id'),
+            (Favorite, shuffled, popularity, 'favorites', 'recipe_id'),
+            (PurchaseList, shuffled, popularity, 'purchases', 'recipe_id'),
+        )
+        for model, targets, weights, option, field in plan:
+            before = model.objects.count()
+            self.insert(model, (
+                model(**edge) for edge in self.edges(
+                    user_ids, targets, weights, options[option], field
+                )
+            ), ignore_conflicts=True)
+            self.log(f'{model._meta.verbose_name_plural}: '
+                     f'{model.objects.count() - before}')
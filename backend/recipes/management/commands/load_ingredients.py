@@ -0,0 +1,65 @@
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import Ingredient
+from recipes.signals import bulk_loaded
+
+
+class Command(BaseCommand):
+    help = ('Загружает ингредиенты из CSV или JSON-фикстуры, '
+            'пропуская уже существующие')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def read_csv(self, path):
+        with open(path, encoding='utf-8', newline='') as file:
+            for row in csv.reader(file):
+                if len(row) >= 2:
+                    yield row[0], row[1]
+
+    def read_json(self, path):
+        with open(path, encoding='utf-8') as file:
+            for item in json.load(file):
+                fields = item.get('fields', item)
+                yield fields['name'], fields['measurement_unit']
+
+    def read(self, path):
+        readers = {'.csv': self.read_csv, '.json': self.read_json}
+        if path.suffix.lower() not in readers:
+            raise CommandError('Поддерживаются только файлы .csv и .json.')
+        if not path.exists():
+            raise CommandError(f'Файл {path} не найден.')
+        seen = set()
+        for name, unit in readers[path.suffix.lower()](path):
+            key = (name.strip(), unit.strip())
+            if all(key) and key not in seen:
+                seen.add(key)
+                yield Ingredient(name=key[0], measurement_unit=key[1])
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        before = Ingredient.objects.count()
+        rows = self.read(options['path'])
+        total = 0
+        with transaction.atomic():
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+            bulk_loaded.send(sender=Ingredient)
+        created = Ingredient.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано: {total}, добавлено: {created}, '
+            f'пропущено: {total - created} '
+            f'за {perf_counter() - started:.2f} с.'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import needs_variants, process_recipe_image
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создает уменьшенные копии изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии для всех рецептов'
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        recipes = Recipe.objects.exclude(image='').exclude(image=None)
+        for recipe in list(recipes):
+            if options['all'] or needs_variants(recipe):
+                process_recipe_image(recipe.pk, recipe.image.name)
+                processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {processed}.'
+        ))
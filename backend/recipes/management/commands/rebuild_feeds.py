@@ -0,0 +1,19 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает ленты подписок всех пользователей'
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        with transaction.atomic():
+            created = rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {created} '
+            f'за {perf_counter() - started:.2f} с.'
+        ))
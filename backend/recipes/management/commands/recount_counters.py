@@ -0,0 +1,21 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import recount_counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счетчики избранного, списков покупок '
+            'и рецептов автора')
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        with transaction.atomic():
+            updated = recount_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецептов обновлено: {updated["recipes"]}, '
+            f'пользователей: {updated["users"]} '
+            f'за {perf_counter() - started:.2f} с.'
+        ))
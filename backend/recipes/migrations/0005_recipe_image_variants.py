@@ -0,0 +1,28 @@
+# Generated by Django 4.0.1 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_edited'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_card',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='recipes/images/variants/', verbose_name='Изображение для карточки'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_full',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='recipes/images/variants/', verbose_name='Полное изображение'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='recipes/images/variants/', verbose_name='Миниатюра'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.0.1 on 2026-10-18 02:42
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(keep=Min('id'), total=Count('id')).filter(total__gt=1)
+    for group in duplicates:
+        extra = Ingredient.objects.filter(
+            name=group['name'],
+            measurement_unit=group['measurement_unit']
+        ).exclude(id=group['keep'])
+        ids = [group['keep'], *extra.values_list('id', flat=True)]
+        rows = IngredientRecipe.objects.filter(
+            ingredient_id__in=ids
+        ).order_by('recipe_id', 'id')
+        kept, removed = {}, []
+        for row in rows:
+            first = kept.setdefault(row.recipe_id, row)
+            if first is not row:
+                first.amount += row.amount
+                removed.append(row.pk)
+        for row in kept.values():
+            row.ingredient_id = group['keep']
+        IngredientRecipe.objects.filter(pk__in=removed).delete()
+        IngredientRecipe.objects.bulk_update(
+            kept.values(), ['ingredient', 'amount']
+        )
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.0.1 on 2026-10-18 02:48
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_purchases(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    PurchaseList = apps.get_model('recipes', 'PurchaseList')
+    first = PurchaseList.objects.values('user', 'recipe').annotate(
+        keep=Min('id')
+    ).values('keep')
+    deleted, _ = PurchaseList.objects.exclude(id__in=first).delete()
+    if deleted:
+        Recipe.objects.update(in_carts_count=Coalesce(
+            Subquery(
+                PurchaseList.objects.filter(
+                    recipe=OuterRef('pk')
+                ).order_by().values('recipe').annotate(
+                    count=Count('pk')
+                ).values('count'),
+                output_field=IntegerField()
+            ),
+            0
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_unique_ingredient'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.RunPython(
+            remove_duplicate_purchases, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='purchaselist',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_purchase'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.0.1 on 2026-10-18 03:10
+
+from django.db import migrations
+
+INSTALL = {
+    'postgresql': (
+        'ALTER TABLE recipes_recipe ADD COLUMN IF NOT EXISTS search_vector '
+        'tsvector GENERATED ALWAYS AS ('
+        "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('russian', coalesce(text, '')), 'B')"
+        ') STORED',
+        'CREATE INDEX IF NOT EXISTS recipe_search_vector_idx '
+        'ON recipes_recipe USING gin (search_vector)',
+    ),
+    'sqlite': (
+        'CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING fts5('
+        "name, text, content='recipes_recipe', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        'CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_insert '
+        'AFTER INSERT ON recipes_recipe BEGIN '
+        'INSERT INTO recipes_recipe_fts (rowid, name, text) '
+        'VALUES (new.id, new.name, new.text); END',
+        'CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_delete '
+        'AFTER DELETE ON recipes_recipe BEGIN '
+        'INSERT INTO recipes_recipe_fts (recipes_recipe_fts, rowid, name, '
+        "text) VALUES ('delete', old.id, old.name, old.text); END",
+        'CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_update '
+        'AFTER UPDATE OF name, text ON recipes_recipe BEGIN '
+        'INSERT INTO recipes_recipe_fts (recipes_recipe_fts, rowid, name, '
+        "text) VALUES ('delete', old.id, old.name, old.text); "
+        'INSERT INTO recipes_recipe_fts (rowid, name, text) '
+        'VALUES (new.id, new.name, new.text); END',
+        'INSERT INTO recipes_recipe_fts (recipes_recipe_fts) '
+        "VALUES ('rebuild')",
+    ),
+}
+UNINSTALL = {
+    'postgresql': (
+        'ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector',
+    ),
+    'sqlite': (
+        'DROP TRIGGER IF EXISTS recipes_recipe_fts_insert',
+        'DROP TRIGGER IF EXISTS recipes_recipe_fts_delete',
+        'DROP TRIGGER IF EXISTS recipes_recipe_fts_update',
+        'DROP TABLE IF EXISTS recipes_recipe_fts',
+    ),
+}
+
+
+def execute(statements, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            cursor.execute(statement)
+
+
+def install(apps, schema_editor):
+    execute(INSTALL, schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    execute(UNINSTALL, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_purchase_unique_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.0.1 on 2026-10-18 03:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+FEED_BACKFILL_SIZE = 100
+FEED_BATCH_SIZE = 1000
+
+
+def fill_feeds(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Subscribe = apps.get_model('recipes', 'Subscribe')
+    FeedItem = apps.get_model('recipes', 'FeedItem')
+    items, current, recipes = [], None, []
+    for user_id, author_id in Subscribe.objects.order_by(
+            'author_id').values_list('user_id', 'author_id').iterator():
+        if author_id != current:
+            current = author_id
+            recipes = list(Recipe.objects.filter(
+                author_id=author_id
+            ).order_by('-pub_date', '-id').values_list(
+                'pk', 'pub_date'
+            )[:FEED_BACKFILL_SIZE])
+        items.extend(
+            FeedItem(user_id=user_id, recipe_id=pk, pub_date=pub_date)
+            for pk, pub_date in recipes
+        )
+        if len(items) >= FEED_BATCH_SIZE:
+            FeedItem.objects.bulk_create(items)
+            items = []
+    FeedItem.objects.bulk_create(items)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_recipe_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(fields=['user', '-pub_date', '-recipe'], name='feed_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feeditem',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_item'),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
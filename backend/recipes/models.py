@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import connections, models, router
+from django.db.models import Exists, OuterRef, Prefetch
+
+from .images import VARIANTS_DIR
 
 User = get_user_model()
 
@@ -24,11 +27,48 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    def short(self):
+        return self.only(
+            'id', 'name', 'image', 'image_thumbnail', 'cooking_time'
+        )
+
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredientrecipe_set',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            )
+        )
+
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(PurchaseList.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_subscribed=Exists(Subscribe.objects.filter(
+                user=user, author=OuterRef('author')
+            ))
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -53,18 +93,65 @@ class Recipe(models.Model):
         blank=True,
         null=True,
     )
+    image_thumbnail = models.ImageField(
+        'Миниатюра',
+        upload_to=VARIANTS_DIR,
+        blank=True,
+        null=True,
+        editable=False
+    )
+    image_card = models.ImageField(
+        'Изображение для карточки',
+        upload_to=VARIANTS_DIR,
+        blank=True,
+        null=True,
+        editable=False
+    )
+    image_full = models.ImageField(
+        'Полное изображение',
+        upload_to=VARIANTS_DIR,
+        blank=True,
+        null=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True
     )
+    edited = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
     cooking_time = models.PositiveIntegerField(
         'Время приготовления'
     )
+    favorites_count = models.PositiveIntegerField(
+        'В избранном',
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        'В списках покупок',
+        default=0,
+        editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -93,6 +180,57 @@ class IngredientRecipe(models.Model):
                 f' {self.ingredient.measurement_unit}')
 
 
+class RelationQuerySet(models.QuerySet):
+    def add(self, **values):
+        obj = self.model(**values)
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        fields = [field for field in self.model._meta.local_concrete_fields
+                  if not field.primary_key]
+        params = [
+            field.get_db_prep_save(field.pre_save(obj, True), connection)
+            for field in fields
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(self.model._meta.db_table)} '
+                f'({", ".join(quote(field.column) for field in fields)}) '
+                f'VALUES ({", ".join(["%s"] * len(params))}) '
+                'ON CONFLICT DO NOTHING',
+                params
+            )
+            return cursor.rowcount > 0
+
+    def delete_rows(self, **values):
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        conditions, params = [], []
+        for name, value in values.items():
+            field = self.model._meta.get_field(name)
+            if isinstance(value, (list, set)):
+                if not value:
+                    return 0
+                placeholders = ', '.join(['%s'] * len(value))
+                conditions.append(f'{quote(field.column)} IN ({placeholders})')
+            else:
+                value = [value]
+                conditions.append(f'{quote(field.column)} = %s')
+            params += [
+                field.get_db_prep_value(getattr(item, 'pk', item), connection)
+                for item in value
+            ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {quote(self.model._meta.db_table)} '
+                f'WHERE {" AND ".join(conditions)}',
+                params
+            )
+            return cursor.rowcount
+
+    def remove(self, **values):
+        return self.delete_rows(**values) > 0
+
+
 class Subscribe(models.Model):
     user = models.ForeignKey(
         User,
@@ -107,6 +245,8 @@ class Subscribe(models.Model):
         related_name='following'
     )
 
+    objects = RelationQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
@@ -135,6 +275,8 @@ class Favorite(models.Model):
         related_name='favored_recipes'
     )
 
+    objects = RelationQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -167,9 +309,52 @@ class PurchaseList(models.Model):
         verbose_name='Дата добавления'
     )
 
+    objects = RelationQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Покупка'
         verbose_name_plural = 'Покупки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_purchase'
+            )
+        ]
 
     def __str__(self):
         return f'Покупка: {self.recipe.name}'
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='feed'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='feed_items'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_item'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_user_pub_date_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Лента {self.user}: {self.recipe_id}'
@@ -0,0 +1,91 @@
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+TABLE = 'recipes_recipe'
+FTS_TABLE = 'recipes_recipe_fts'
+SEARCH_CONFIG = 'russian'
+WORD = re.compile(r'\w+')
+
+SQLITE_TRIGGERS = (
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert '
+    f'AFTER INSERT ON {TABLE} BEGIN '
+    f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+    f'VALUES (new.id, new.name, new.text); END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete '
+    f'AFTER DELETE ON {TABLE} BEGIN '
+    f'INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, text) '
+    f"VALUES ('delete', old.id, old.name, old.text); END",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update '
+    f'AFTER UPDATE OF name, text ON {TABLE} BEGIN '
+    f'INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, text) '
+    f"VALUES ('delete', old.id, old.name, old.text); "
+    f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+    f'VALUES (new.id, new.name, new.text); END',
+)
+SQLITE_INSTALL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    f"name, text, content='{TABLE}', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    *SQLITE_TRIGGERS,
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+
+def execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def restore_sqlite_search(connection):
+    if (connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()):
+        execute(connection, SQLITE_INSTALL)
+
+
+def search_terms(query):
+    return WORD.findall(query.lower())
+
+
+def postgresql_search(queryset, query):
+    tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT id FROM {TABLE} WHERE search_vector @@ {tsquery}',
+        (query,)
+    )).alias(search_rank=RawSQL(
+        f'ts_rank("{TABLE}"."search_vector", {tsquery})',
+        (query,),
+        output_field=FloatField()
+    ))
+
+
+def sqlite_search(queryset, query):
+    match = ' '.join(f'"{term}"*' for term in search_terms(query))
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,)
+    )).alias(search_rank=RawSQL(
+        f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{TABLE}"."id"',
+        (match,),
+        output_field=FloatField()
+    ))
+
+
+SEARCH = {'postgresql': postgresql_search, 'sqlite': sqlite_search}
+
+
+def search_recipes(queryset, query):
+    if not search_terms(query):
+        return queryset.none()
+    search = SEARCH.get(connections[queryset.db].vendor)
+    if search is None:
+        return queryset.filter(
+            Q(name__icontains=query) | Q(text__icontains=query)
+        )
+    return search(queryset, query).order_by(
+        '-search_rank', '-pub_date', '-id'
+    )
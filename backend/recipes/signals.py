@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import Signal, receiver
+
+from .counters import change_counter
+from .feed import backfill, fan_out, prune
+from .images import discard_variants, needs_variants, schedule_variants
+from .models import Favorite, PurchaseList, Recipe, Subscribe
+from .search import restore_sqlite_search
+
+User = get_user_model()
+
+bulk_loaded = Signal()
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+        fan_out(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    if needs_variants(instance):
+        schedule_variants(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+    discard_variants(instance)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=PurchaseList)
+def purchase_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'in_carts_count', 1)
+
+
+@receiver(post_delete, sender=PurchaseList)
+def purchase_deleted(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'in_carts_count', -1)
+
+
+@receiver(post_save, sender=Subscribe)
+def subscribe_created(sender, instance, created, **kwargs):
+    if created:
+        backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscribe)
+def subscribe_deleted(sender, instance, **kwargs):
+    prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_migrate)
+def search_index_migrated(sender, using, **kwargs):
+    if sender.name == 'recipes':
+        restore_sqlite_search(connections[using])
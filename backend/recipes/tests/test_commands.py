@@ -0,0 +1,67 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase
+
+from api.cache import reference_versions
+from recipes.models import Favorite, Ingredient, PurchaseList, Subscribe
+
+User = get_user_model()
+
+
+class LoadIngredientsTests(TestCase):
+    def load(self, content, suffix='.csv'):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / f'ingredients{suffix}'
+            path.write_text(content, encoding='utf-8')
+            output = StringIO()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('load_ingredients', path, stdout=output)
+        return output.getvalue()
+
+    def test_skips_duplicates_and_existing_rows(self):
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        output = self.load('соль,г\nсахар,г\n сахар , г\nмука,кг\n,г\n')
+        self.assertIn('Прочитано: 3, добавлено: 2, пропущено: 1', output)
+        self.assertEqual(Ingredient.objects.count(), 3)
+
+    def test_json_fixture(self):
+        self.load(
+            '[{"fields": {"name": "соль", "measurement_unit": "г"}},'
+            ' {"name": "мука", "measurement_unit": "кг"}]',
+            suffix='.json'
+        )
+        self.assertEqual(
+            set(Ingredient.objects.values_list('name', flat=True)),
+            {'соль', 'мука'}
+        )
+
+    def test_bumps_reference_version(self):
+        version = reference_versions.get('ingredients')
+        self.load('перец,г\n')
+        self.assertNotEqual(reference_versions.get('ingredients'), version)
+
+    def test_unsupported_file(self):
+        with self.assertRaises(CommandError):
+            self.load('соль;г', suffix='.txt')
+
+
+class GenerateFakeDataTests(TestCase):
+    def test_inserts_requested_distinct_edges(self):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент {i}', measurement_unit='г')
+            for i in range(12)
+        )
+        call_command(
+            'generate_fake_data', users=10, recipes=20, subscriptions=30,
+            favorites=150, purchases=40, stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Subscribe.objects.count(), 30)
+        self.assertEqual(Favorite.objects.count(), 150)
+        self.assertEqual(PurchaseList.objects.count(), 40)
+        self.assertFalse(Subscribe.objects.filter(user=F('author')).exists())
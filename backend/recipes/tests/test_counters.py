@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from recipes.counters import recount_counters
+from recipes.models import Favorite, PurchaseList, Recipe
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='user@test.ru', username='user'
+        )
+        cls.author = User.objects.create(
+            email='author@test.ru', username='author'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Борщ', text='Свекла и капуста',
+            cooking_time=60
+        )
+
+    def counters(self):
+        return Recipe.objects.values_list(
+            'favorites_count', 'in_carts_count'
+        ).get(pk=self.recipe.pk)
+
+    def test_orm_changes_update_counters(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        PurchaseList.objects.create(user=self.user, recipe=self.recipe)
+        self.assertEqual(self.counters(), (1, 1))
+        PurchaseList.objects.filter(user=self.user).delete()
+        self.assertEqual(self.counters(), (1, 0))
+        self.user.delete()
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_author_recipe_count(self):
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
+        self.recipe.delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 0)
+
+    def test_recount_repairs_drift(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Recipe.objects.update(favorites_count=5, in_carts_count=2)
+        User.objects.update(recipes_count=0)
+        self.assertEqual(
+            recount_counters(), {'recipes': 1, 'users': 2}
+        )
+        self.assertEqual(self.counters(), (1, 0))
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from recipes.feed import rebuild_feeds
+from recipes.models import FeedItem, Recipe, Subscribe
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='user@test.ru', username='user'
+        )
+        cls.author = User.objects.create(
+            email='author@test.ru', username='author'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Борщ', text='Свекла и капуста',
+            cooking_time=60
+        )
+
+    def feed(self):
+        return list(FeedItem.objects.filter(user=self.user).order_by(
+            '-pub_date'
+        ).values_list('recipe_id', flat=True))
+
+    def test_subscription_backfills_and_new_recipes_fan_out(self):
+        subscription = Subscribe.objects.create(
+            user=self.user, author=self.author
+        )
+        self.assertEqual(self.feed(), [self.recipe.pk])
+        recipe = Recipe.objects.create(
+            author=self.author, name='Щи', text='Капуста', cooking_time=40
+        )
+        self.assertEqual(self.feed(), [recipe.pk, self.recipe.pk])
+        subscription.delete()
+        self.assertEqual(self.feed(), [])
+
+    def test_rebuild(self):
+        Subscribe.objects.bulk_create(
+            [Subscribe(user=self.user, author=self.author)]
+        )
+        self.assertEqual(self.feed(), [])
+        self.assertEqual(rebuild_feeds(), 1)
+        self.assertEqual(self.feed(), [self.recipe.pk])
@@ -0,0 +1,104 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTestCase(TransactionTestCase):
+    migrate_from = None
+    migrate_to = None
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    def setUp(self):
+        self.apps = self.migrate(self.migrate_from)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        self.migrate(executor.loader.graph.leaf_nodes('recipes')[0])
+
+
+class MergeDuplicateIngredientsTests(MigrationTestCase):
+    migrate_from = ('recipes', '0005_recipe_image_variants')
+    migrate_to = ('recipes', '0006_unique_ingredient')
+
+    def test_duplicates_are_merged_with_amounts(self):
+        User = self.apps.get_model('users', 'User')
+        Ingredient = self.apps.get_model('recipes', 'Ingredient')
+        Recipe = self.apps.get_model('recipes', 'Recipe')
+        IngredientRecipe = self.apps.get_model('recipes', 'IngredientRecipe')
+        author = User.objects.create(email='author@test.ru',
+                                     username='author')
+        kept, first, second = [
+            Ingredient.objects.create(name='соль', measurement_unit='г')
+            for _ in range(3)
+        ]
+        other = Ingredient.objects.create(name='соль', measurement_unit='кг')
+        both, only_duplicates = [
+            Recipe.objects.create(author=author, name=name, text='Описание',
+                                  cooking_time=5)
+            for name in ('Суп', 'Салат')
+        ]
+        IngredientRecipe.objects.bulk_create([
+            IngredientRecipe(recipe=both, ingredient=kept, amount=10),
+            IngredientRecipe(recipe=both, ingredient=first, amount=5),
+            IngredientRecipe(recipe=both, ingredient=other, amount=1),
+            IngredientRecipe(recipe=only_duplicates, ingredient=first,
+                             amount=2),
+            IngredientRecipe(recipe=only_duplicates, ingredient=second,
+                             amount=3),
+        ])
+
+        apps = self.migrate(self.migrate_to)
+
+        Ingredient = apps.get_model('recipes', 'Ingredient')
+        IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+        self.assertEqual(
+            set(Ingredient.objects.values_list('pk', flat=True)),
+            {kept.pk, other.pk}
+        )
+        self.assertEqual(
+            set(IngredientRecipe.objects.values_list(
+                'recipe_id', 'ingredient_id', 'amount'
+            )),
+            {(both.pk, kept.pk, 15), (both.pk, other.pk, 1),
+             (only_duplicates.pk, kept.pk, 5)}
+        )
+
+
+class FillFeedsTests(MigrationTestCase):
+    migrate_from = ('recipes', '0008_recipe_search')
+    migrate_to = ('recipes', '0009_feeditem')
+
+    def test_existing_subscriptions_get_recent_recipes(self):
+        User = self.apps.get_model('users', 'User')
+        Recipe = self.apps.get_model('recipes', 'Recipe')
+        Subscribe = self.apps.get_model('recipes', 'Subscribe')
+        user, other, author, quiet = [
+            User.objects.create(email=f'{name}@test.ru', username=name)
+            for name in ('user', 'other', 'author', 'quiet')
+        ]
+        recipes = [
+            Recipe.objects.create(author=author, name=name, text='Описание',
+                                  cooking_time=5)
+            for name in ('Суп', 'Салат')
+        ]
+        Recipe.objects.create(author=user, name='Каша', text='Описание',
+                              cooking_time=5)
+        Subscribe.objects.bulk_create([
+            Subscribe(user=user, author=author),
+            Subscribe(user=other, author=author),
+            Subscribe(user=user, author=quiet),
+        ])
+
+        apps = self.migrate(self.migrate_to)
+
+        FeedItem = apps.get_model('recipes', 'FeedItem')
+        self.assertEqual(
+            set(FeedItem.objects.values_list('user_id', 'recipe_id')),
+            {(subscriber.pk, recipe.pk)
+             for subscriber in (user, other) for recipe in recipes}
+        )
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete
+from django.test import TestCase
+
+from recipes.models import Favorite, PurchaseList, Recipe, Subscribe
+
+User = get_user_model()
+
+
+class RelationQuerySetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            email='user@test.ru', username='user'
+        )
+        cls.author = User.objects.create(
+            email='author@test.ru', username='author'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Борщ', text='Свекла и капуста',
+            cooking_time=60
+        )
+
+    def test_add_reports_created_rows(self):
+        self.assertTrue(
+            Favorite.objects.add(user=self.user, recipe=self.recipe)
+        )
+        self.assertFalse(
+            Favorite.objects.add(user=self.user, recipe_id=self.recipe.pk)
+        )
+        self.assertEqual(Favorite.objects.count(), 1)
+
+    def test_add_fills_defaults(self):
+        self.assertTrue(
+            PurchaseList.objects.add(user=self.user, recipe=self.recipe)
+        )
+        self.assertIsNotNone(PurchaseList.objects.get().created_at)
+
+    def test_remove_reports_deleted_rows(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                Favorite.objects.remove(user=self.user, recipe=self.recipe)
+            )
+        self.assertFalse(
+            Favorite.objects.remove(user=self.user, recipe_id=self.recipe.pk)
+        )
+
+    def test_remove_skips_delete_signals(self):
+        Subscribe.objects.create(user=self.user, author=self.author)
+        deleted = []
+
+        def receiver(sender, **kwargs):
+            deleted.append(sender)
+
+        post_delete.connect(receiver, sender=Subscribe)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Subscribe)
+        self.assertTrue(
+            Subscribe.objects.remove(user=self.user, author_id=self.author.pk)
+        )
+        self.assertEqual(deleted, [])
+
+    def test_delete_rows_with_several_values(self):
+        other = Recipe.objects.create(
+            author=self.author, name='Щи', text='Капуста', cooking_time=40
+        )
+        for recipe in (self.recipe, other):
+            Favorite.objects.create(user=self.user, recipe=recipe)
+            Favorite.objects.create(user=self.author, recipe=recipe)
+        self.assertEqual(
+            Favorite.objects.delete_rows(
+                user=self.user, recipe=[self.recipe, other]
+            ),
+            2
+        )
+        self.assertEqual(
+            Favorite.objects.delete_rows(user=self.user, recipe=[]), 0
+        )
+        self.assertEqual(Favorite.objects.filter(user=self.author).count(), 2)
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from recipes.models import Recipe
+from recipes.search import search_recipes
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            email='author@test.ru', username='author'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Борщ', text='Свекла и капуста',
+            cooking_time=60
+        )
+
+    def search(self, query):
+        return list(search_recipes(
+            Recipe.objects.all(), query
+        ).values_list('pk', flat=True))
+
+    def test_name_ranks_above_text(self):
+        recipe = Recipe.objects.create(
+            author=self.author, name='Капустный пирог', text='Тесто',
+            cooking_time=90
+        )
+        self.assertEqual(self.search('капуст'), [recipe.pk, self.recipe.pk])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('борщ свекла'), [self.recipe.pk])
+        self.assertEqual(self.search('борщ пирог'), [])
+
+    def test_rank_is_not_selected(self):
+        queryset = search_recipes(Recipe.objects.all(), 'борщ')
+        self.assertNotIn('search_rank', queryset.values()[0])
+
+    def test_empty_query(self):
+        self.assertEqual(self.search(' ,.'), [])
+
+    def test_deleted_recipes_leave_index(self):
+        self.recipe.delete()
+        self.assertEqual(self.search('борщ'), [])
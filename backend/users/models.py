@@ -4,6 +4,11 @@ from django.db import models
 
 class User(AbstractUser):
     email = models.EmailField(unique=True, max_length=254)
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False
+    )
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
     USERNAME_FIELD = 'email'
 